@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the bytes per instance and construction time of the slotted
+models against the same models with a per-instance __dict__, as they were
+before they defined __slots__.
+
+The dict-backed versions are empty subclasses of the models, which is also
+how a bot's own subclasses without __slots__ behave.
+
+Usage:
+    python benchmarks/model_memory.py [instances]
+"""
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from showdown import client, message, user
+
+def with_dict(cls):
+    """
+    Returns a subclass of cls whose instances have a __dict__.
+    """
+    return type(cls.__name__, (cls,), {})
+
+MODELS = [
+    ('User', user.User, lambda cls, i: cls('+Player {}'.format(i))),
+    ('ChatMessage', message.ChatMessage,
+        lambda cls, i: cls('lobby', 1500000000, '+Player', 'hi {}'.format(i))),
+    ('PrivateMessage', message.PrivateMessage,
+        lambda cls, i: cls('+Player', ' Bot', 'hi {}'.format(i))),
+    ('OutputToken', client.OutputToken,
+        lambda cls, i: cls('lobby|hi {}'.format(i), 0, 1)),
+]
+
+def bytes_per_instance(cls, build, count):
+    """
+    Returns the average number of bytes kept per instance of cls.
+    """
+    gc.collect()
+    tracemalloc.start()
+    instances = [build(cls, i) for i in range(count)]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return size / count
+
+def construction_time(cls, build, count):
+    """
+    Returns the best average time in microseconds to build an instance.
+    """
+    timer = timeit.Timer(lambda: [build(cls, i) for i in range(count)])
+    return min(timer.repeat(repeat=3, number=1)) / count * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print('{:,} instances per model'.format(count))
+    print('{:>16} {:>10} {:>10} {:>10} {:>10}'.format('model', 'dict B',
+        'slots B', 'dict us', 'slots us'))
+    for name, cls, build in MODELS:
+        dict_cls = with_dict(cls)
+        print('{:>16} {:>10,.0f} {:>10,.0f} {:>10.2f} {:>10.2f}'.format(name,
+            bytes_per_instance(dict_cls, build, count),
+            bytes_per_instance(cls, build, count),
+            construction_time(dict_cls, build, count),
+            construction_time(cls, build, count)))
+
+if __name__ == '__main__':
+    main()
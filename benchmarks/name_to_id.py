@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Checks showdown.normalize against the regex based name_to_id and auth
+parsing it replaced, then times both.
+
+The parity check covers every single code point, with and without an auth
+prefix, and a corpus of usernames in the styles seen on the server: plain
+ASCII names, names with spaces and symbols, and names in other scripts.
+Any mismatch is printed and the script exits with status 1.
+
+Usage:
+    python benchmarks/name_to_id.py [names]
+"""
+import os
+import random
+import re
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from showdown import normalize
+
+USERNAMES = [
+    'Zarel', '~Zarel', 'Script Kitty', 'balto', '%Lux', '@Argus2Spooky',
+    'Crashy ★ - ', 'sweepy_poo', 'X-Act', 'Marty', '+The Immortal',
+    'p0kémon master', 'Ünown Ⅻ', 'Ｆｕｌｌｗｉｄｔｈ', 'Ichigo Kurosaki 一護',
+    'Ямы', 'Ψυχή', 'ميسي', 'שלום', 'กรุงเทพ', '포켓몬', 'ポケモン', '皮卡丘',
+    'Ӝ\u0308ombie', 'İstanbul', 'Straße', 'ǅemal', 'ﬁreﬂy', '\u212aelvin',
+    '1337 h4x0r', '_under_score_', '   ', '', '#Staff', '&Admin', '★Star',
+]
+
+ALPHABETS = [
+    string.ascii_letters + string.digits + ' _-.',
+    string.punctuation,
+    'áéíóúñüçøåæœßÁÉÍÓÚÑÜÇØÅÆŒ',
+    'абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙ',
+    'αβγδεζηθικλμνξοπρστυφχψωΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩ',
+    'あいうえおかきくけこアイウエオカキクケコ漢字中文한국어',
+    '٠١٢٣٤٥٦٧٨٩ابتثجحخ०१२३४५६७८९',
+    '\u0300\u0301\u0308\u200b\u200d\ufe0f★☆♪♥✓\U0001f600\U0001f47e',
+    'ⅠⅡⅢⅣⅫ①②③¹²³½ＡＢＣａｂｃ０１２\u212a\u0130\u03a3',
+]
+
+def old_name_to_id(input_str):
+    return re.sub(r'(\W|_)', '', input_str.lower())
+
+def old_split_auth(user_str):
+    if not user_str:
+        return ' ', ''
+    elif user_str[0].lower() not in string.ascii_lowercase:
+        return user_str[0], user_str[1:]
+    return ' ', user_str
+
+def make_names(count, seed=0):
+    """
+    Returns count synthetic usernames mixing the alphabets above.
+    """
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        alphabet = rng.choice(ALPHABETS[:1] * 6 + ALPHABETS)
+        name = ''.join(rng.choice(alphabet)
+                       for _ in range(rng.randint(1, 18)))
+        names.append(rng.choice(' +%@#&~') + name if rng.random() < 0.3
+                     else name)
+    return names
+
+def check_parity(names):
+    """
+    Returns a list of the inputs on which the old and new functions differ.
+    """
+    mismatches = []
+    code_points = (chr(i) for i in range(sys.maxunicode + 1)
+                   if not 0xd800 <= i <= 0xdfff)
+    for char in code_points:
+        for name in (char, '@' + char, char + 'Name'):
+            if old_name_to_id(name) != normalize.name_to_id(name) or \
+                    old_split_auth(name) != normalize.split_auth(name):
+                mismatches.append(name)
+    for name in names:
+        if old_name_to_id(name) != normalize.name_to_id(name) or \
+                old_split_auth(name) != normalize.split_auth(name):
+            mismatches.append(name)
+    return mismatches
+
+def best(func, names):
+    """
+    Returns the best time in nanoseconds per call of func over names.
+    """
+    timer = timeit.Timer(lambda: [func(name) for name in names])
+    return min(timer.repeat(repeat=5, number=1)) / len(names) * 1e9
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    names = USERNAMES + make_names(count)
+    mismatches = check_parity(names)
+    print('parity: {:,} names and every code point, {} mismatches'.format(
+        len(names), len(mismatches)))
+    for name in mismatches[:20]:
+        print('  {!r}: {!r} != {!r}'.format(name, old_name_to_id(name),
+                                            normalize.name_to_id(name)))
+
+    ascii_names = [name for name in names if name.isascii()]
+    unicode_names = [name for name in names if not name.isascii()]
+    #A room's worth of names seen over and over, as in chat and userlists
+    rng = random.Random(1)
+    repeated = [rng.choice(names[:2000]) for _ in range(count)]
+    uncached = normalize.name_to_id.__wrapped__
+    print('{:>16} {:>10} {:>10} {:>10}'.format('ns per call', 'regex',
+                                               'table', 'cached'))
+    for label, corpus in (('ascii', ascii_names), ('unicode', unicode_names),
+                          ('repeated', repeated)):
+        normalize.name_to_id.cache_clear()
+        print('{:>16} {:>10.0f} {:>10.0f} {:>10.0f}'.format(label,
+            best(old_name_to_id, corpus), best(uncached, corpus),
+            best(normalize.name_to_id, corpus)))
+    print('{:>16} {:>10.0f} {:>10.0f}'.format('split_auth',
+        best(old_split_auth, names), best(normalize.split_auth, names)))
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
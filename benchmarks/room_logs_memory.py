@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the memory used by room logs stored in a deque of Event strings,
+as rooms used to keep them, against showdown.logstore.LogStore.
+
+Usage:
+    python benchmarks/room_logs_memory.py [lines per room]
+"""
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from showdown import event, logstore
+
+ROOM_COUNTS = (100, 1000, 10000)
+MAX_LOGS = 5000
+
+def make_lines(num_lines, seed=0):
+    """
+    Returns a list of num_lines synthetic battle and chat lines.
+    """
+    rng = random.Random(seed)
+    templates = [
+        '|move|p{side}a: Garchomp|Earthquake|p{other}a: Heatran',
+        '|-damage|p{side}a: Heatran|{hp}/100',
+        '|switch|p{side}a: Toxapex|Toxapex, F|{hp}/100',
+        '|-boost|p{side}a: Dragapult|spe|1',
+        '|turn|{turn}',
+        '|c|+Player{side}|gl hf, turn {turn}',
+        '|j| Spectator{hp}',
+        '|',
+    ]
+    return [rng.choice(templates).format(side=rng.randint(1, 2),
+                                         other=rng.randint(1, 2),
+                                         hp=rng.randint(0, 100), turn=i)
+            for i in range(num_lines)]
+
+def measure(build):
+    """
+    Returns the number of bytes allocated while build runs and kept after.
+    """
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+def fill_deque(num_rooms, lines):
+    rooms = []
+    for i in range(num_rooms):
+        logs = deque(maxlen=MAX_LOGS)
+        room_id = 'battle-{}'.format(i)
+        for line in lines:
+            logs.append(event.Event(line, room_id))
+        rooms.append(logs)
+    return rooms
+
+def fill_store(num_rooms, lines):
+    rooms = []
+    for i in range(num_rooms):
+        logs = logstore.LogStore(MAX_LOGS, 'battle-{}'.format(i))
+        for line in lines:
+            logs.append(line)
+        rooms.append(logs)
+    return rooms
+
+def main():
+    lines_per_room = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    lines = make_lines(lines_per_room)
+    print('{} lines per room'.format(lines_per_room))
+    print('{:>8} {:>16} {:>16} {:>8}'.format('rooms', 'deque', 'LogStore',
+                                             'ratio'))
+    for num_rooms in ROOM_COUNTS:
+        deque_size = measure(lambda: fill_deque(num_rooms, lines))
+        store_size = measure(lambda: fill_store(num_rooms, lines))
+        print('{:>8,} {:>14,.1f}MB {:>14,.1f}MB {:>7.1f}x'.format(num_rooms,
+            deque_size / 2 ** 20, store_size / 2 ** 20,
+            deque_size / store_size))
+
+if __name__ == '__main__':
+    main()
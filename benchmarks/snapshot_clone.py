@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Measures how many times per second a battle's state can be cloned, comparing
+copy.deepcopy of a showdown.room.Battle against BattleSnapshot.copy.
+
+Usage:
+    python benchmarks/snapshot_clone.py [log lines]
+"""
+import copy
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from showdown import room
+
+TEAMS = {
+    'p1': ['Pikachu', 'Garchomp', 'Ferrothorn', 'Toxapex', 'Dragapult',
+           'Heatran'],
+    'p2': ['Landorus', 'Corviknight', 'Clefable', 'Rillaboom', 'Weavile',
+           'Kingambit']
+}
+MOVES = ['Thunderbolt', 'Earthquake', 'Stealth Rock', 'U-turn']
+
+def build_battle(num_lines):
+    """
+    Returns a Battle fed with num_lines lines of a synthetic battle log.
+    """
+    battle = room.Battle('battle-gen9ou-1', max_logs=num_lines)
+    lines = ['|player|p1|Alice|1|', '|player|p2|Bob|2|', '|gen|9',
+             '|tier|[Gen 9] OU']
+    for side_id, team in TEAMS.items():
+        lines.append('|teamsize|{}|6'.format(side_id))
+        lines.extend('|poke|{}|{}, L50|'.format(side_id, species)
+                     for species in team)
+    turn = 0
+    while len(lines) < num_lines:
+        turn += 1
+        lines.append('|turn|{}'.format(turn))
+        for side_id, team in TEAMS.items():
+            species = team[turn % len(team)]
+            ident = '{}a: {}'.format(side_id, species)
+            lines.append('|switch|{}|{}, L50|{}/100'.format(
+                ident, species, 100 - turn % 50))
+            lines.append('|move|{}|{}|'.format(ident, MOVES[turn % 4]))
+            lines.append('|-boost|{}|atk|1'.format(ident))
+            lines.append('|-damage|{}|{}/100'.format(ident, 90 - turn % 50))
+        lines.append('|-weather|RainDance|[upkeep]')
+    for line in lines[:num_lines]:
+        battle.add_content(line)
+    return battle
+
+def rate(func, seconds=1.0):
+    """
+    Returns the number of calls of func per second.
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * seconds / elapsed))
+    return number / timer.timeit(number)
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    battle = build_battle(num_lines)
+    snapshot = battle.snapshot()
+
+    deepcopy_rate = rate(lambda: copy.deepcopy(battle))
+    snapshot_rate = rate(lambda: battle.snapshot())
+    clone_rate = rate(snapshot.copy)
+
+    print('Battle with {} log lines, {} turns'.format(num_lines, battle.turn))
+    print('{:<28}{:>14,.0f} /s'.format('copy.deepcopy(battle)', deepcopy_rate))
+    print('{:<28}{:>14,.0f} /s'.format('battle.snapshot()', snapshot_rate))
+    print('{:<28}{:>14,.0f} /s ({:,.0f}x deepcopy)'.format(
+        'snapshot.copy()', clone_rate, clone_rate / deepcopy_rate))
+    print('{:<28}{:>14,} bytes'.format('pickled battle',
+        len(pickle.dumps(battle, pickle.HIGHEST_PROTOCOL))))
+    print('{:<28}{:>14,} bytes'.format('pickled snapshot',
+        len(pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL))))
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,12 @@
 """
 An example client that joins any rooms that its
 specified owner does.
+
+Rooms the owner leaves are left as soon as the leave
+is seen, using the client's presence index. Rooms the
+bot isn't in yet can only be found through userdetails,
+which is requested when the owner moves and otherwise
+polled slowly.
 """
 import showdown
 import logging
@@ -21,19 +27,27 @@ class FollowerClient(showdown.Client):
     def __init__(self, **kwargs):
         showdown.Client.__init__(self, **kwargs)
         self.owner = showdown.User(ownername, client=self)
+        self.presence.track(ownername)
+
+    async def on_login(self, login_response):
+        await self.owner.request_user_details()
+
+    async def on_tracked_leave(self, user_id, room_obj):
+        if room_obj is not None:
+            await self.leave(room_obj.id)
+        #The owner may have moved to a room we aren't in
+        await self.owner.request_user_details()
 
     async def on_query_response(self, response_type, data):
         logger.info(data)
-        if response_type == 'userdetails':
+        if response_type == 'userdetails' and data.get('userid') == \
+                self.owner.id:
             user_rooms = set(map(strip_prefix, data.get('rooms') or {}))
-            bot_rooms = set(self.rooms)
-            for room in user_rooms - bot_rooms:
+            for room in user_rooms - set(self.rooms):
                 await self.join(room)
-            for room in bot_rooms - user_rooms:
-                await self.leave(room)
 
-    @showdown.Client.on_interval(interval=3)
-    async def get_owner_details(self): 
+    @showdown.Client.on_interval(interval=60)
+    async def get_owner_details(self):
         await self.owner.request_user_details()
 
-FollowerClient(name=username, password=password).start()
\ No newline at end of file
+FollowerClient(name=username, password=password).start()
@@ -10,4 +10,6 @@ from .user import User
 from .server import Server
 from .message import ChatMessage, PrivateMessage
 from .room import Room, Battle
+from .pool import ClientPool
+from .shard import ShardedRunner
 from . import utils
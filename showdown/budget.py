@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Module for the LogBudget class"""
+import math
+import time
+from collections import OrderedDict
+
+LRU = 'lru'
+ACTIVITY = 'activity'
+POLICIES = (LRU, ACTIVITY)
+
+#Approximate bytes used to index each line in a LogStore
+LINE_OVERHEAD = 10
+
+def memory_store(store):
+    """
+    Returns the part of a log store that holds lines in memory.
+    """
+    return getattr(store, 'recent', store)
+
+class _Usage:
+    """
+    Bookkeeping for one log store charged to a LogBudget.
+    """
+    __slots__ = ('lines', 'bytes', 'activity', 'updated')
+
+    def __init__(self, now):
+        self.lines = 0
+        self.bytes = 0
+        self.activity = 0.0
+        self.updated = now
+
+    def decayed_activity(self, now, half_life):
+        return self.activity * 0.5 ** ((now - self.updated) / half_life)
+
+class LogBudget:
+    """
+    Class representing a client wide limit on the logs kept by its rooms,
+    in lines, bytes or both. Rooms' log stores charge each line they keep to
+    the budget, and when it's exceeded the oldest lines of other rooms are
+    evicted. Rooms marked as reclaimable, such as ended battles the client
+    is still in, are evicted from first. Rooms the client leaves are removed
+    from the budget entirely.
+
+    Args:
+        max_lines (:obj:`int` or None, optional) : The maximum number of lines
+            kept across every room. Defaults to None.
+        max_bytes (:obj:`int` or None, optional) : The maximum number of bytes
+            of encoded lines kept across every room. Defaults to None.
+        policy (:obj:`str`, optional) : How rooms are chosen for eviction.
+            'lru' evicts from the room that received a line least recently.
+            'activity' evicts from the room with the most lines for how
+            active it has been lately. Defaults to 'lru'.
+        half_life (:obj:`float`, optional) : The number of seconds it takes
+            for a room's activity score to halve. Defaults to 300.
+        batch (:obj:`int`, optional) : The maximum number of lines evicted
+            from a room at once. Defaults to 32.
+
+    Attributes:
+        lines (:obj:`int`) : The number of lines currently charged.
+        bytes (:obj:`int`) : The number of bytes currently charged.
+        evicted (:obj:`int`) : The number of lines evicted so far.
+
+    Example:
+        budget = LogBudget(max_bytes=256 * 2 ** 20, policy='activity')
+        client = MyClient(name, password, max_room_logs=100000,
+                          log_budget=budget)
+    """
+    def __init__(self, max_lines=None, max_bytes=None, policy=LRU, *,
+                 half_life=300.0, batch=32):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of {}, not {!r}'.format(
+                POLICIES, policy))
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.half_life = half_life
+        self.batch = batch
+        self.lines = 0
+        self.bytes = 0
+        self.evicted = 0
+        self._stores = OrderedDict()
+        self._reclaimable = OrderedDict()
+
+    def __repr__(self):
+        return '<{} {}/{} lines {}/{} bytes>'.format(self.__class__.__name__,
+            self.lines, self.max_lines, self.bytes, self.max_bytes)
+
+    def add(self, store):
+        """
+        Has store charge its lines to the budget from now on. For stores that
+        keep part of their lines elsewhere, like a SpillLogStore, only the
+        lines held in memory are charged.
+        """
+        memory_store(store).budget = self
+
+    def remove(self, store):
+        """
+        Stops charging store to the budget and releases its usage.
+        """
+        store = memory_store(store)
+        usage = self._stores.pop(store, None) or \
+            self._reclaimable.pop(store, None)
+        if usage is not None:
+            self.lines -= usage.lines
+            self.bytes -= usage.bytes
+        store.budget = None
+
+    def mark_reclaimable(self, store):
+        """
+        Marks store as the first to be evicted from, such as when its battle
+        has ended.
+        """
+        store = memory_store(store)
+        usage = self._stores.pop(store, None)
+        if usage is not None:
+            self._reclaimable[store] = usage
+
+    def over(self):
+        """
+        Returns True if the budget is exceeded.
+        """
+        return (self.max_lines is not None and self.lines > self.max_lines) \
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+
+    def charge(self, store, lines, size):
+        """
+        Records that store added (or, when negative, dropped) lines totalling
+        size bytes. Lines are evicted from other stores if the budget is
+        exceeded. This method isn't intended to be called directly, but by
+        log stores.
+        """
+        size += lines * LINE_OVERHEAD
+        self.lines += lines
+        self.bytes += size
+        usage = self._reclaimable.get(store)
+        if usage is None:
+            usage = self._stores.get(store)
+            if usage is None:
+                usage = self._stores[store] = _Usage(time.monotonic())
+            elif lines > 0:
+                self._stores.move_to_end(store)
+        usage.lines += lines
+        usage.bytes += size
+        if lines > 0:
+            if self.policy == ACTIVITY:
+                now = time.monotonic()
+                usage.activity = usage.decayed_activity(now,
+                    self.half_life) + lines
+                usage.updated = now
+            if self.over():
+                self._enforce(store)
+        elif usage.lines <= 0:
+            self._stores.pop(store, None)
+            self._reclaimable.pop(store, None)
+
+    def _victim(self, current):
+        """
+        Returns the store to evict from next, or None if there isn't one.
+        The newest line of current is never evicted.
+        """
+        for store, usage in self._reclaimable.items():
+            if usage.lines > (store is current):
+                return store
+        if self.policy == LRU:
+            for store, usage in self._stores.items():
+                if usage.lines > (store is current):
+                    return store
+            return None
+        now = time.monotonic()
+        victim, worst = None, -math.inf
+        for store, usage in self._stores.items():
+            if usage.lines <= (store is current):
+                continue
+            score = usage.lines / (1 + usage.decayed_activity(now,
+                self.half_life))
+            if score > worst:
+                victim, worst = store, score
+        return victim
+
+    def _enforce(self, current):
+        while self.over():
+            victim = self._victim(current)
+            if victim is None:
+                break
+            count = min(self.batch, len(victim) - (victim is current))
+            victim.drop(count)
+            self.evicted += count
+
+    def stats(self):
+        """
+        Returns a dict describing the budget's current use.
+        """
+        return {
+            'lines': self.lines,
+            'bytes': self.bytes,
+            'rooms': len(self._stores) + len(self._reclaimable),
+            'reclaimable': len(self._reclaimable),
+            'evicted': self.evicted
+        }
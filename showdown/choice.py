@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Module for the TurnChoice class"""
+import math
+from . import request
+
+class TurnChoice:
+    """
+    Class used to build the choice for every active slot of a turn, and send
+    them all as a single /choose command. Each slot's choice is checked
+    against the request it answers, and a choice that has already been sent
+    can be changed, which undoes and rechooses in one frame.
+
+    Args:
+        battle (:obj:`showdown.room.Battle`) : The battle the choice is for.
+        battle_request (:obj:`showdown.request.BattleRequest`, optional) : The
+            request the choice answers. Defaults to the battle's latest
+            request.
+
+    Attributes:
+        battle (:obj:`showdown.room.Battle`) : The battle the choice is for.
+        request (:obj:`showdown.request.BattleRequest`) : The request the
+            choice answers.
+        slots (:obj:`list`) : The choice string of each slot, or None for
+            slots that haven't been chosen yet.
+        sent (:obj:`str` or None) : The last choice string sent for the
+            request, or None if nothing has been sent.
+
+    Example:
+        turn = battle.turn_choice()
+        turn.move(1, target=2, terastallize=True).switch(4)
+        await turn.send()
+    """
+    def __init__(self, battle, battle_request=None):
+        self.battle = battle
+        self.request = battle_request or battle.request
+        if self.request is None:
+            raise ValueError('{} has no request to answer'.format(battle.id))
+        self.slots = [None] * len(self.request.slot_choices)
+        self.sent = None
+
+    def __repr__(self):
+        return '<{} {} rqid={} {!r}>'.format(self.__class__.__name__,
+            self.battle.id, self.request.rqid, self.slots)
+
+    def __str__(self):
+        return self.choice_string()
+
+    def _next_slot(self, slot):
+        if slot is not None:
+            return slot
+        for i, slot_choice in enumerate(self.slots):
+            if slot_choice is None:
+                return i
+        raise ValueError('every slot already has a choice')
+
+    def add(self, slot_choice, slot=None):
+        """
+        Sets the choice of a slot after checking it against the request.
+
+        Args:
+            slot_choice (:obj:`str`) : The slot's choice. Ex: 'move 1 2'
+            slot (:obj:`int`, optional) : The index of the slot. Defaults to
+                the first slot without a choice.
+
+        Raises:
+            ValueError : Raised when the choice isn't legal for the slot.
+
+        Returns:
+            TurnChoice : The object itself, so calls can be chained.
+        """
+        slot = self._next_slot(slot)
+        if slot >= len(self.slots):
+            raise ValueError('rqid {} has no slot {}'.format(
+                self.request.rqid, slot))
+        if slot_choice not in self.request.slot_choices[slot]:
+            raise ValueError('{!r} is not a legal choice for slot {}'.format(
+                slot_choice, slot))
+        self.slots[slot] = slot_choice
+        return self
+
+    def move(self, move_index, target=None, *, mega=False, zmove=False,
+             dynamax=False, terastallize=False, slot=None):
+        """
+        Chooses a move for a slot.
+
+        Args:
+            move_index (:obj:`int`) : The 1-based index of the move.
+            target (:obj:`int`, optional) : The position the move targets.
+                Negative for allies. Ignored when there's a single active.
+            mega, zmove, dynamax, terastallize (:obj:`bool`, optional) : Flags
+                for the mechanic to use along with the move.
+            slot (:obj:`int`, optional) : The index of the slot. Defaults to
+                the first slot without a choice.
+        """
+        slot_choice = 'move {}'.format(move_index)
+        if target is not None and len(self.slots) > 1:
+            slot_choice += ' {}'.format(target)
+        for flag, suffix in zip((mega, zmove, dynamax, terastallize),
+                                request.GIMMICKS):
+            if flag:
+                slot_choice += suffix
+        return self.add(slot_choice, slot)
+
+    def switch(self, team_index, slot=None):
+        """
+        Chooses a switch for a slot.
+
+        Args:
+            team_index (:obj:`int`) : The 1-based position of the pokemon to
+                switch in, in the request's team order.
+            slot (:obj:`int`, optional) : The index of the slot. Defaults to
+                the first slot without a choice.
+        """
+        return self.add('switch {}'.format(team_index), slot)
+
+    def skip(self, slot=None):
+        """
+        Passes for a slot that has nothing to do.
+        """
+        return self.add('pass', slot)
+
+    def clear(self, slot=None):
+        """
+        Clears the choice of a slot, or of every slot if slot is None.
+        """
+        if slot is None:
+            self.slots = [None] * len(self.slots)
+        else:
+            self.slots[slot] = None
+        return self
+
+    def choice_string(self):
+        """
+        Returns the choice string for the whole turn. Slots whose only option
+        is to pass are filled in automatically.
+
+        Raises:
+            ValueError : Raised when a slot has no choice, or when the slots'
+                choices can't be combined.
+        """
+        slot_choices = []
+        for slot, slot_choice in enumerate(self.slots):
+            if slot_choice is None:
+                if self.request.slot_choices[slot] != ['pass']:
+                    raise ValueError('slot {} has no choice'.format(slot))
+                slot_choice = 'pass'
+            slot_choices.append(slot_choice)
+        if not request.combination_is_legal(slot_choices,
+                self.request.min_switches):
+            raise ValueError('{!r} is not a legal combination'.format(
+                slot_choices))
+        return ', '.join(slot_choices)
+
+    async def send(self, client=None, delay=0, lifespan=math.inf):
+        """
+        |coro|
+
+        Sends the turn's choice in a single frame. If a different choice was
+        already sent for the request, it's undone and replaced in the same
+        frame.
+
+        Raises:
+            ValueError : Raised when the battle has received a newer request,
+                or when the choice is incomplete or illegal.
+
+        Returns:
+            str : The choice string that was sent.
+        """
+        if self.battle.request is not self.request:
+            raise ValueError('rqid {} has been superseded in {}'.format(
+                self.request.rqid, self.battle.id))
+        choice = self.choice_string()
+        if choice == self.sent:
+            return choice
+        if self.sent is None:
+            await self.battle.choose(choice, self.request.rqid, client=client,
+                delay=delay, lifespan=lifespan)
+        else:
+            await self.battle.rechoose(choice, self.request.rqid,
+                client=client, delay=delay, lifespan=lifespan)
+        self.sent = choice
+        return choice
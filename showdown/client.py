@@ -4,35 +4,51 @@ import asyncio
 import aiohttp
 import requests
 import websockets
-import json
 import time
 import logging
 import traceback
 import warnings
 import math
 from functools import wraps, partial
-from . import message, room, server, user, utils, docutils
+from . import message, room, server, user, utils, docutils, supervisor, \
+    scheduler, ratelimit, jsonlib, event, frozen, spill, budget, presence
 
 #Logging setup
 logger = logging.getLogger(__name__)
 
+#Seconds to wait for the log that follows a request before answering it
+#anyway, as when a request is sent on joining a battle in progress
+REQUEST_SETTLE_DELAY = 1.0
+
 class OutputToken:
     """
     Class used with the client's output queue to schedule when outputs should
-    be used, delayed, or discarded.
+    be used, delayed, or discarded. The ignore_before and discard_after
+    attributes are time.monotonic values. Each line of content is JSON encoded
+    once on creation, so frames can be assembled without re-encoding.
     """
+    __slots__ = ('content', 'encoded', 'size', 'ignore_before',
+                 'discard_after', 'sent', 'discarded')
+
     def __init__(self, content, ignore_before, discard_after):
         self.content = [content] if type(content) is str else content
+        self.encoded = [jsonlib.dumps(line) for line in self.content]
+        self.size = sum(map(len, self.encoded)) + len(self.encoded)
         self.ignore_before = ignore_before
         self.discard_after = discard_after
         self.sent = False
         self.discarded = False
 
-    def expired(self):
-        return time.time() > self.discard_after
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, self.content)
+
+    def expired(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now > self.discard_after
 
-    def ready(self):
-        return time.time() > self.ignore_before
+    def ready(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now >= self.ignore_before
 
 class Client(user.User):
     """
@@ -56,7 +72,7 @@ class Client(user.User):
         max_room_logs (:obj:`int`, optional) : The number of logs to save for
             active rooms. A log is any event that takes place in a room, 
             including user joins, leaves, chat messages, and raw html. This
-            information is stored in a FIFO deque.
+            information is stored in a compact FIFO queue.
         server_id (:obj:`str`, optional) : The id of the server the client will
             connect to. For a list of all associated  servers, visit the page
             at https://pokemonshowdown.com/servers. This value defaults to 
@@ -65,6 +81,43 @@ class Client(user.User):
             client will connect to. This value is None by default, and will be
             retrieved automatically from 
             https://pokemonshowdown.com/servers/{host_name}.json
+        max_hook_tasks (:obj:`int` or None, optional) : The maximum number of
+            hook tasks (on_receive, on_chat_message, ...) that can be in flight
+            at once. None disables the cap. Defaults to 1000.
+        hook_overflow (:obj:`str`, optional) : What to do with a new hook when
+            max_hook_tasks has been reached. 'block' waits for a running hook
+            to finish, 'drop' discards the hook, and 'inline' awaits the hook
+            directly in the receiver. Defaults to 'block'.
+        max_frame_lines (:obj:`int`, optional) : The maximum number of lines
+            the sender coalesces into a single websocket frame. Defaults to 6.
+        max_frame_bytes (:obj:`int`, optional) : The maximum size of a
+            coalesced websocket frame. A single output larger than this is
+            still sent on its own. Defaults to 8192.
+        server_obj (:obj:`showdown.server.Server`, optional) : A Server object
+            to use instead of creating one from server_id and server_host.
+            Allows several clients to share server metadata.
+        session (:obj:`aiohttp.ClientSession`, optional) : An http session
+            to use instead of opening one on connection. The client will not
+            close a session passed in this way.
+        rate_limiter (:obj:`showdown.ratelimit.RateLimiter`, optional) : The
+            limiter used to pace outputs. Defaults to a RateLimiter modeled on
+            the server's chat throttle.
+        decision_executor (:obj:`showdown.decision.DecisionExecutor`,
+            optional) : Executor used to answer battle requests off of the
+            event loop. If None, requests are only passed to on_request.
+            Defaults to None.
+        freeze_battles (:obj:`str` or None, optional) : If set, battles are
+            replaced in rooms by a compressed showdown.frozen.FrozenBattle
+            once they end, using the named compression ('zlib' or 'zstd').
+            Defaults to None.
+        log_segments (:obj:`showdown.spill.SegmentStore`, optional) : If
+            set, every room's full history is written to these segment
+            files, and only the last max_room_logs lines of each room are
+            kept in memory. The client doesn't close the store. Defaults to
+            None.
+        log_budget (:obj:`showdown.budget.LogBudget`, optional) : A limit on
+            the logs kept across all of the client's rooms. Rooms still keep
+            at most max_room_logs lines each. Defaults to None.
 
     Attributes:
         server (showdown.server.Server) : object representing the server the 
@@ -76,8 +129,8 @@ class Client(user.User):
             client. Used to login.
         challengestr (str) : Token assigned by the server to identify the 
             client. Used to login.
-        output_queue (asyncio.Queue) : Queue used to manage what is sent back
-            to the server websocket.
+        output_queue (showdown.scheduler.OutputScheduler) : Scheduler used to
+            manage what is sent back to the server websocket.
         rooms (dict) : Dictionary with entries of {str : showdown.room.Room} 
             that maps room_id's to Rooms the client is currently connected to.
         max_room_logs (int) : The maximum number of logs stored in this client's
@@ -91,30 +144,69 @@ class Client(user.User):
         loop (asyncio event loop (Differs between platforms)) : The event loop
             used for the client's websocket interactions and methods specified
             with the on_interval decorator
+        supervisor (showdown.supervisor.TaskSupervisor) : Supervisor used to
+            run the client's hook coroutines as tasks.
+        rate_limiter (showdown.ratelimit.RateLimiter) : Token bucket limiter
+            used to pace the client's outputs.
+        ready (asyncio.Event) : Event set once the client has logged in, or
+            once it has connected if autologin is disabled.
+        decision_executor (showdown.decision.DecisionExecutor) : Executor
+            used to answer battle requests, or None.
+        log_budget (showdown.budget.LogBudget) : The budget the rooms' logs
+            are charged to, or None.
+        users (showdown.user.UserRegistry) : Registry sharing one User object
+            per name and auth across the client's rooms and messages.
+        presence (showdown.presence.PresenceIndex) : Index of the rooms each
+            user is in. Users tracked with presence.track trigger the
+            on_tracked_join and on_tracked_leave hooks.
     """
 
     def __init__(self, name='', password='', *, loop=None, max_room_logs=5000,
-                    server_id='showdown', server_host=None):
+                    server_id='showdown', server_host=None,
+                    max_hook_tasks=1000, hook_overflow=supervisor.BLOCK,
+                    rate_limiter=None, max_frame_lines=6,
+                    max_frame_bytes=8192, server_obj=None, session=None,
+                    decision_executor=None, freeze_battles=None,
+                    log_segments=None, log_budget=None):
         super().__init__(name, client=self)
 
         # URL setup
-        self.server = server.Server(id=server_id, host=server_host, client=self)
+        self.server = server_obj or server.Server(id=server_id,
+            host=server_host, client=self)
         self.websocket_url = self.server.generate_ws_url()
         logger.info('Using websocket at {}'.format(self.websocket_url))
 
         # Initialize client attributes
         self.password = password
         self.challengekeyid, self.challstr = None, None
-        self.output_queue = asyncio.Queue()
+        self.output_queue = scheduler.OutputScheduler()
+        self.rate_limiter = rate_limiter or ratelimit.RateLimiter()
+        self.max_frame_lines = max_frame_lines
+        self.max_frame_bytes = max_frame_bytes
+        self.decision_executor = decision_executor
+        self.freeze_battles = freeze_battles
+        self.log_segments = log_segments
+        self.log_budget = log_budget
+        self.users = user.UserRegistry(client=self)
+        self.presence = presence.PresenceIndex()
         self.rooms = {}
         self.challenges = {};
         self.connected = False
         self.max_room_logs = max_room_logs
         self.autologin = True
         self.websocket = None #Initialized in _handler
-        self.session = None
+        self.session = session
+        self._owns_session = session is None
+        self.ready = asyncio.Event()
         self.loop = loop or asyncio.get_event_loop()
+        self.supervisor = supervisor.TaskSupervisor(max_tasks=max_hook_tasks,
+            policy=hook_overflow, loop=self.loop)
         self._tasks = []
+        self._handler_task = None
+        self._pending_requests = {}
+        self._fresh_requests = set()
+        self._handlers = self._collect_handlers()
+        self._hooks_receive = type(self).on_receive is not Client.on_receive
 
     def start(self, autologin=True):
         """
@@ -131,8 +223,10 @@ class Client(user.User):
         self.autologin = autologin
         try:
             if self.loop.is_running():
-                task = self.add_task(self._handler())
-                task.add_done_callback(lambda f: _on_disconnect())
+                #Not a hook, so it's kept out of the supervisor's task cap
+                task = self._handler_task = self.loop.create_task(
+                    self._handler())
+                task.add_done_callback(lambda f: self._on_disconnect())
                 logger.info("The client's event loop was already running. "
                             "The client will run as a task on the loop.")
                 return
@@ -147,14 +241,43 @@ class Client(user.User):
             traceback.print_exc()
         self._on_disconnect()
 
+    async def run(self, autologin=True):
+        """
+        |coro|
+
+        Connects to the server and runs the client on the current event loop
+        until it disconnects. Use this instead of Client.start when the loop
+        is managed elsewhere, for example by a showdown.pool.ClientPool.
+
+        Args:
+            autologin (:obj:`bool`, optional) : Bool denoting whether or not the
+                client will automatically login after connecting to the server. 
+                Defaults to True.
+        """
+        self.autologin = autologin
+        try:
+            await self._handler()
+        finally:
+            self._on_disconnect()
+
     @docutils.format()
     async def _handler(self):
         """
         Creates websocket connection and adds any methods flagged by the 
         on_interval decorator to the event loop.
         """
-        async with websockets.connect(self.websocket_url) as self.websocket, \
-                                  aiohttp.ClientSession() as self.session:
+        if self._owns_session:
+            async with aiohttp.ClientSession() as self.session:
+                await self._connection_handler()
+        else:
+            await self._connection_handler()
+
+    async def _connection_handler(self):
+        """
+        Opens the websocket connection and runs the client's interval tasks
+        until one of them completes.
+        """
+        async with websockets.connect(self.websocket_url) as self.websocket:
             self.connected = True
             self.server.set_session(self.session)
             tasks = []
@@ -167,6 +290,8 @@ class Client(user.User):
                                     return_when=asyncio.FIRST_COMPLETED)
                 for task in pending:
                     task.cancel()
+            except asyncio.CancelledError:
+                raise
             except:
                 import traceback
                 traceback.print_exc()
@@ -178,16 +303,121 @@ class Client(user.User):
                     t.cancel()
                     logger.info('Cancelled: {}'.format(t))
             self._tasks = []
+            self.supervisor.cancel_all()
+            self.ready.clear()
             self.connected = False
             self.on_disconnect()
 
     def add_task(self, coro):
-        task = asyncio.ensure_future(
-                coro,
-                loop = self.loop
-        )
-        self._tasks.append(task)
-        return task
+        """
+        Runs coro as a task supervised by the client. The task is released
+        once it finishes, and any exception it raises is logged.
+
+        Returns:
+            asyncio.Task : The created task.
+        """
+        return self.supervisor.start(coro)
+
+    async def run_hook(self, coro):
+        """
+        |coro|
+
+        Runs a hook coroutine as a supervised task, applying the client's
+        hook_overflow policy if max_hook_tasks are already in flight.
+
+        Returns:
+            asyncio.Task or None : The created task, or None if the hook was
+                dropped or awaited inline.
+        """
+        return await self.supervisor.spawn(coro)
+
+    def metrics(self):
+        """
+        Returns a dict of metrics describing the client's current load.
+        """
+        client_metrics = {
+            'rooms': len(self.rooms),
+            'output_queue': self.output_queue.qsize(),
+            'tasks': self.supervisor.stats(),
+            'rate_limit': self.rate_limiter.stats()
+        }
+        if self.decision_executor is not None:
+            client_metrics['decisions'] = self.decision_executor.stats()
+        if self.log_budget is not None:
+            client_metrics['log_budget'] = self.log_budget.stats()
+        return client_metrics
+
+    def _collect_handlers(self):
+        """
+        Builds the client's dispatch table from methods flagged by the 
+        on_input decorator. Base class handlers are registered before those of
+        subclasses, and overriding a flagged method keeps its registration.
+        """
+        flagged = {}
+        for cls in reversed(type(self).__mro__):
+            for att_name, att in vars(cls).items():
+                inp_types = getattr(att, '_input_types', None)
+                if inp_types is not None:
+                    flagged.pop(att_name, None)
+                    flagged[att_name] = inp_types
+        handlers = {}
+        for att_name, inp_types in flagged.items():
+            for inp_type in inp_types:
+                handlers.setdefault(inp_type, []).append(
+                    getattr(self, att_name))
+        return handlers
+
+    def add_handler(self, inp_type, handler):
+        """
+        Registers a handler for the given inp_type at runtime. Handlers are
+        called in the order they were registered.
+
+        Args:
+            inp_type (:obj:`str`) : The type of input to handle.
+                Ex: 'c:', 'pm', 'init', 'win'
+            handler (coroutine function) : Coroutine function called with a
+                showdown.event.Event for every matching input.
+        """
+        self._handlers.setdefault(inp_type, []).append(handler)
+
+    def remove_handler(self, inp_type, handler):
+        """
+        Unregisters a handler previously added for the given inp_type.
+
+        Raises:
+            ValueError : Raised if the handler is not registered for inp_type.
+        """
+        handlers = self._handlers.get(inp_type, [])
+        handlers.remove(handler)
+        if not handlers:
+            self._handlers.pop(inp_type, None)
+
+    def on_input(*inp_types):
+        """
+        A decorator creator to flag methods that should handle specific input
+        types received by the client. Handlers are coroutines called with a
+        showdown.event.Event, and are awaited in order by the client's
+        receiver, after the input has been added to its room. Long running work
+        should be scheduled with Client.run_hook instead.
+
+        Args:
+            *inp_types (:obj:`str`) : The input types handled by the method.
+                Ex: 'c:', 'pm', 'init', 'win'
+
+        Returns:
+            func - A decorator function that flags the passed in func to be
+                added to the client's dispatch table.
+
+        Example:
+            class WinLogger(showdown.Client):
+                @showdown.Client.on_input('win')
+                async def log_win(self, event):
+                    print('{} won {}'.format(event.param(0), event.room_id))
+        """
+        def decorator(func):
+            func._input_types = inp_types
+            return func
+        return decorator
 
     def on_interval(interval=0.0):
         """
@@ -227,28 +457,53 @@ class Client(user.User):
         """
         |coro|
 
-        Waits for relevant output to appear in the client's output_queue 
-        attribute, and sends it back to the server through websocket.
+        Waits for the next output in the client's output_queue attribute to 
+        become due, then coalesces every other due output into the same 
+        websocket frame, up to max_frame_lines and max_frame_bytes. Waits for
+        the client's rate_limiter to allow the frame, and sends it back to the
+        server through websocket. Outputs keep their queue order within the
+        frame.
 
         Returns:
             None
         """
         out = await self.output_queue.get()
-        now = time.time()
-        if not out.ready():
-            logger.info('>>> Requeuing {}'.format(out))
-            await self.output_queue.put(out)
-            await asyncio.sleep(.05)
-            return
-        if out.expired():
-            logger.info('>>> Discarding {}'.format(out))
-            out.discarded = True
+        batch = [out]
+        num_lines, size = len(out.content), out.size
+        max_lines = min(self.max_frame_lines,
+            max(num_lines, self.rate_limiter.available()))
+        while num_lines < max_lines:
+            nxt = self.output_queue.peek_nowait()
+            if nxt is None or num_lines + len(nxt.content) > max_lines \
+                    or size + nxt.size > self.max_frame_bytes:
+                break
+            batch.append(self.output_queue.get_nowait())
+            num_lines += len(nxt.content)
+            size += nxt.size
+
+        content = [line for token in batch for line in token.content]
+        wait = self.rate_limiter.wait_time(content)
+        if wait > 0:
+            self.rate_limiter.total_wait += wait
+            await asyncio.sleep(wait)
+
+        now = time.monotonic()
+        lines, encoded = [], []
+        for token in batch:
+            if token.expired(now):
+                logger.info('>>> Discarding {}'.format(token))
+                token.discarded = True
+            else:
+                lines.extend(token.content)
+                encoded.extend(token.encoded)
+        if not encoded:
             return
-        content = [out.content] if type(out.content) is str else out.content
-        logger.info('>>> Sending:\n{}'.format(content))
-        await self.websocket.send(json.dumps(content))
-        out.sent = True
-        await asyncio.sleep(len(content) * .5)
+        frame = '[{}]'.format(','.join(encoded))
+        logger.info('>>> Sending:\n{}'.format(frame))
+        self.rate_limiter.consume(lines)
+        await self.websocket.send(frame)
+        for token in batch:
+            token.sent = not token.discarded
 
     @docutils.format()
     async def add_output(self, content, delay=0, lifespan=math.inf):
@@ -273,7 +528,7 @@ class Client(user.User):
         assert delay >= 0 and lifespan >= 0, \
             'Lifespan and delay should be nonnegative'
 
-        now = time.time()
+        now = time.monotonic()
         ignore_before = now + delay
         discard_after = now + lifespan
         token = OutputToken(content, ignore_before, discard_after)
@@ -285,8 +540,11 @@ class Client(user.User):
         """
         |coro|
 
-        Awaits input from websocket and parses the important stuff. Subclasses 
-        can hook into the input through Client.on_receive.
+        Awaits input from websocket and parses the important stuff. Each input
+        is dispatched to the handlers registered for its type (see
+        Client.on_input), so input types without handlers cost a single
+        lookup. Subclasses can also hook into all input through
+        Client.on_receive.
         """
         socket_input = await self.websocket.recv()
         logger.debug('<<< Received:\n{}'.format(socket_input))
@@ -295,86 +553,249 @@ class Client(user.User):
         if socket_input == 'o':
             logger.info('Connected on {}'.format(self.websocket_url))
             self.connected = True
-            self.add_task(self.on_connect())
+            await self.run_hook(self.on_connect())
             return
 
-        inputs = utils.parse_socket_input(socket_input)
-        for room_id, inp in inputs:
+        frame_rooms = set()
+        for room_id, inp in utils.iter_socket_input(socket_input):
             logger.debug('||| Parsing:\n{}'.format(inp))
-            inp_type, params = utils.parse_text_input(inp)
-            
-            #Set challstr attributes and autologin
-            if inp_type == 'challstr':
-                self.challengekeyid, self.challstr = params
-                if self.name and self.password and self.autologin:
-                    await self.login()
-                elif self.autologin:
-                    msg = ("Cannot login without username and password. If "
-                           "you don't want your client to be logged in, "
-                           "you can use Client.start(autologin=False).")
-                    raise Exception(msg)
-
-            #Process query response
-            elif inp_type == 'queryresponse':
-                response_type, data = params[0], '|'.join(params[1:])
-                data = json.loads(data)
-                self.add_task(
-                    self.on_query_response(response_type, data),
-                )
-                if response_type == 'savereplay':
-                    self.add_task(
-                        self.server.save_replay_async(data)
-                    )
-
-            #Challenge updates
-            elif inp_type == 'updatechallenges':
-                self.challenges = json.loads(params[0])
-                self.add_task(
-                    self.on_challenge_update(self.challenges)
-                )
+            inp_event = event.Event(inp, room_id)
+            inp_type = inp_event.type
+            frame_rooms.add(room_id)
 
-            #Messages
-            elif inp_type == 'c:' or inp_type == 'c':
-                timestamp = None
-                if inp_type == 'c:':
-                    timestamp, params = int(params[0]), params[1:]
-                author_str, *content = params
-                content = '|'.join(content)
-                chat_message = message.ChatMessage(room_id, timestamp,
-                    author_str, content, client=self)
-                self.add_task(
-                    self.on_chat_message(chat_message)
-                )
-            elif inp_type == 'pm':
-                author_str, recipient_str, *content = params
-                content = '|'.join(content)
-                private_message = message.PrivateMessage(
-                    author_str, recipient_str, content, client=self)
-                self.add_task(
-                    self.on_private_message(private_message)
+            #add content to proper room
+            room_obj = self.rooms.get(room_id, None)
+            if room_obj is not None:
+                room_obj.add_content(inp_event)
+
+            handlers = self._handlers.get(inp_type)
+            if handlers:
+                for handler in handlers:
+                    await handler(inp_event)
+
+            if self._hooks_receive:
+                await self.run_hook(
+                    self.on_receive(room_id, inp_type, inp_event.params),
                 )
 
-            #Rooms
-            elif inp_type == 'init':
-                room_type = params[0]
-                room_obj = room.class_map.get(room_type, room.Room)(
-                    room_id, client=self, max_logs=self.max_room_logs)
-                self.rooms[room_id] = room_obj
-                self.add_task(
-                    self.on_room_init(room_obj)
-                )
-            elif inp_type == 'deinit':
-                if room_id in self.rooms:
-                    self.add_task(
-                        self.on_room_deinit(self.rooms.pop(room_id))
-                    )
+        #Requests are sent before the log they apply to, so they're answered
+        #once a later frame for the battle has been processed
+        if self._pending_requests:
+            for room_id in frame_rooms - self._fresh_requests:
+                await self._answer_request(room_id)
+        self._fresh_requests.clear()
+
+    # # # # # # # # # # # # #
+    # Built-in input handlers #
+    # # # # # # # # # # # # #
+
+    @on_input('challstr')
+    async def _handle_challstr(self, inp_event):
+        """
+        Sets challstr attributes and logs in if autologin is set.
+        """
+        self.challengekeyid, self.challstr = inp_event.params
+        if self.name and self.password and self.autologin:
+            await self.login()
+        elif self.autologin:
+            msg = ("Cannot login without username and password. If "
+                   "you don't want your client to be logged in, "
+                   "you can use Client.start(autologin=False).")
+            raise Exception(msg)
+        else:
+            self.ready.set()
 
-            #add content to proper room
-            if isinstance(self.rooms.get(room_id, None), room.Room):
-                self.rooms[room_id].add_content(inp)
+    @on_input('queryresponse')
+    async def _handle_queryresponse(self, inp_event):
+        """
+        Decodes query responses and uploads saved replays.
+        """
+        response_type, data = inp_event.param(0), inp_event.json
+        await self.run_hook(
+            self.on_query_response(response_type, data),
+        )
+        if response_type == 'savereplay':
+            await self.run_hook(
+                self.server.save_replay_async(data)
+            )
+
+    @on_input('updatechallenges')
+    async def _handle_updatechallenges(self, inp_event):
+        """
+        Updates the client's challenges attribute.
+        """
+        self.challenges = inp_event.json
+        await self.run_hook(
+            self.on_challenge_update(self.challenges)
+        )
+
+    @on_input('c:', 'c')
+    async def _handle_chat(self, inp_event):
+        """
+        Builds ChatMessage objects for the on_chat_message hook.
+        """
+        timestamp, offset = None, 0
+        if inp_event.type == 'c:':
+            timestamp, offset = int(inp_event.param(0)), 1
+        author_str = inp_event.param(offset)
+        content = inp_event.rest(offset + 1)
+        chat_message = message.ChatMessage(inp_event.room_id, timestamp,
+            author_str, content, client=self)
+        await self.run_hook(
+            self.on_chat_message(chat_message)
+        )
+
+    @on_input('pm')
+    async def _handle_pm(self, inp_event):
+        """
+        Builds PrivateMessage objects for the on_private_message hook.
+        """
+        author_str, recipient_str = inp_event.param(0), inp_event.param(1)
+        content = inp_event.rest(2)
+        private_message = message.PrivateMessage(
+            author_str, recipient_str, content, client=self)
+        await self.run_hook(
+            self.on_private_message(private_message)
+        )
+
+    @on_input('raw', 'error', 'popup')
+    async def _handle_throttle(self, inp_event):
+        """
+        Slows down the client's rate_limiter when the server reports that
+        messages are being sent too fast.
+        """
+        room_id = inp_event.room_id
+        if ratelimit.is_throttle_notice(inp_event.rest()):
+            self.rate_limiter.throttle('' if room_id == 'lobby' else room_id)
+
+    @on_input('users', 'j', 'join', 'l', 'leave', 'n', 'name')
+    async def _handle_presence(self, inp_event):
+        """
+        Calls the tracked user hooks for the joins and leaves recorded while
+        the room processed the line.
+        """
+        for joined, user_id, room_id in self.presence.pop_changes():
+            room_obj = self.rooms.get(room_id)
+            if joined:
+                await self.run_hook(self.on_tracked_join(user_id, room_obj))
+            else:
+                await self.run_hook(self.on_tracked_leave(user_id, room_obj))
 
-            self.add_task(
-                self.on_receive(room_id, inp_type, params),
+    @on_input('request')
+    async def _handle_request(self, inp_event):
+        """
+        Holds the battle's decoded request until the log it applies to has
+        been processed. Team preview and forced switch requests have no log
+        to wait for, and are answered right away.
+        """
+        room_id = inp_event.room_id
+        battle = self.rooms.get(room_id)
+        if not isinstance(battle, room.Battle) or not inp_event.json:
+            return
+        battle_request = battle.request
+        self._pending_requests[room_id] = battle_request
+        if battle_request.team_preview or battle_request.force_switch:
+            await self._answer_request(room_id)
+        else:
+            self._fresh_requests.add(room_id)
+            await self.run_hook(
+                self._settle_request(room_id, battle_request)
+            )
+
+    @on_input('turn', 'upkeep')
+    async def _handle_turn_end(self, inp_event):
+        """
+        Answers a battle's pending request once the turn's log is complete.
+        """
+        if inp_event.room_id in self._pending_requests:
+            await self._answer_request(inp_event.room_id)
+
+    async def _settle_request(self, room_id, battle_request):
+        """
+        Answers battle_request if no log has followed it after
+        REQUEST_SETTLE_DELAY seconds.
+        """
+        await asyncio.sleep(REQUEST_SETTLE_DELAY)
+        if self._pending_requests.get(room_id) is battle_request:
+            await self._answer_request(room_id)
+
+    async def _answer_request(self, room_id):
+        """
+        Passes the battle's pending request to the on_request hook, and to
+        the client's decision_executor if it has one. Requests superseded in
+        the meantime are dropped.
+        """
+        battle_request = self._pending_requests.pop(room_id, None)
+        battle = self.rooms.get(room_id)
+        if battle_request is None or not isinstance(battle, room.Battle) or \
+                battle.request is not battle_request:
+            return
+        await self.run_hook(
+            self.on_request(battle, battle_request)
+        )
+        if self.decision_executor is not None and not battle_request.wait:
+            await self.run_hook(
+                self.decision_executor.decide(battle)
+            )
+
+    @on_input('win', 'tie')
+    async def _handle_battle_end(self, inp_event):
+        """
+        Replaces an ended battle with a FrozenBattle if freeze_battles is set.
+        Otherwise its logs are the first to be evicted under log_budget.
+        """
+        self._pending_requests.pop(inp_event.room_id, None)
+        battle = self.rooms.get(inp_event.room_id)
+        if not isinstance(battle, room.Battle):
+            return
+        if self.freeze_battles:
+            if self.log_budget is not None:
+                self.log_budget.remove(battle.logs)
+            self.rooms[battle.id] = frozen.FrozenBattle.freeze(battle,
+                self.freeze_battles)
+        elif self.log_budget is not None:
+            self.log_budget.mark_reclaimable(battle.logs)
+
+    @on_input('init')
+    async def _handle_init(self, inp_event):
+        """
+        Creates a Room object for the initialized room.
+        """
+        room_id, room_type = inp_event.room_id, inp_event.param(0)
+        logs = None
+        if self.log_segments is not None:
+            logs = spill.SpillLogStore(self.max_room_logs, room_id,
+                self.log_segments)
+        room_obj = room.class_map.get(room_type, room.Room)(
+            room_id, client=self, max_logs=self.max_room_logs, logs=logs)
+        if self.log_budget is not None:
+            self.log_budget.add(room_obj.logs)
+        self.rooms[room_id] = room_obj
+        room_obj.add_content(inp_event)
+        await self.run_hook(
+            self.on_room_init(room_obj)
+        )
+
+    @on_input('deinit')
+    async def _handle_deinit(self, inp_event):
+        """
+        Removes the deinitialized room from the client's rooms.
+        """
+        room_id = inp_event.room_id
+        self.rate_limiter.remove_room(room_id)
+        self._pending_requests.pop(room_id, None)
+        if room_id in self.rooms:
+            room_obj = self.rooms.pop(room_id)
+            if isinstance(room_obj, room.Room):
+                #Nothing can reach the logs of a room that's been left
+                if self.log_budget is not None:
+                    self.log_budget.remove(room_obj.logs)
+                self.presence.remove_room(room_id, room_obj.userlist)
+            else:
+                #Frozen battles don't keep their userlist
+                self.presence.remove_room(room_id)
+            await self.run_hook(
+                self.on_room_deinit(room_obj)
             )
 
     async def login(self):
@@ -401,7 +822,8 @@ class Client(user.User):
             logger.info('Login succeeded')
         await self.websocket.send('["|/trn {},0,{}"]'
             .format(self.name, login_data['assertion']))
-        self.add_task(
+        self.ready.set()
+        await self.run_hook(
             self.on_login(login_data)
         )
 
@@ -471,8 +893,8 @@ class Client(user.User):
         """
         battle_format = utils.name_to_id(battle_format)
         team = team or 'null'
-        await self.upload_team(team, delay=delay, lifespan=lifespan)
-        await self.add_output('|/vtm {}'.format(battle_format),
+        await self.add_output(['|/utm {}'.format(utils.to_team_str(team)),
+            '|/vtm {}'.format(battle_format)],
             delay=delay, lifespan=lifespan)
 
     @docutils.format()
@@ -492,8 +914,8 @@ class Client(user.User):
             battle_formats like randombattles, where no team is needed to be provided.
         """
         battle_format = utils.name_to_id(battle_format)
-        await self.upload_team(team, delay=delay, lifespan=lifespan)
-        await self.add_output('|/search {}'.format(battle_format),
+        await self.add_output(['|/utm {}'.format(utils.to_team_str(team)),
+            '|/search {}'.format(battle_format)],
             delay=delay, lifespan=lifespan)
 
     @docutils.format()
@@ -867,6 +1289,63 @@ class Client(user.User):
         """
         pass
 
+    async def on_request(self, battle, battle_request):
+        """
+        |coro|
+
+        Hook for subclasses. Called when the client is asked to make a choice
+        in a battle it's playing in. The server sends requests before the log
+        they apply to, so the hook is called once that log has been processed
+        (see REQUEST_SETTLE_DELAY). Team preview and forced switch requests
+        are passed on right away.
+
+        Args:
+            battle (:obj:`showdown.room.Battle`) : The battle the request was
+                sent in. Its state has already been updated.
+            battle_request (:obj:`showdown.request.BattleRequest`) : The
+                decoded request, with its legal choices precomputed on first
+                access. Answer it with battle.choose(choice).
+
+        Notes:
+            Does nothing by default.
+        """
+        pass
+
+    async def on_tracked_join(self, user_id, room_obj):
+        """
+        |coro|
+
+        Hook for subclasses. Called when a user tracked with
+        Client.presence.track joins one of the client's rooms, or is in a
+        room the client joins.
+
+        Args:
+            user_id (:obj:`str`) : The id of the tracked user.
+            room_obj (:obj:`room.Room`) : The room the user joined. The user
+                is in its userlist.
+
+        Notes:
+            Does nothing by default.
+        """
+        pass
+
+    async def on_tracked_leave(self, user_id, room_obj):
+        """
+        |coro|
+
+        Hook for subclasses. Called when a user tracked with
+        Client.presence.track leaves one of the client's rooms, or renames
+        to a different id. Isn't called when the client itself leaves.
+
+        Args:
+            user_id (:obj:`str`) : The id of the tracked user.
+            room_obj (:obj:`room.Room`) : The room the user left.
+
+        Notes:
+            Does nothing by default.
+        """
+        pass
+
     async def on_chat_message(self, chat_message):
         """
         |coro|
@@ -912,7 +1391,10 @@ class Client(user.User):
                 Ex: 'l' (user leave), 'j' (user join), 'c:' (chat message)
             params (:obj:`list`) : List of the parameters associated with the 
                 inp_type. Ex: a user leave has params of ['zarel'], where 'zarel'
-                represents the user id of the user that left.
+                represents the user id of the user that left. This is the
+                same list cached on the input's Event, which handlers also
+                read, so it shouldn't be modified. Room logs store the line
+                itself, so they aren't affected either way.
 
         Notes:
             Does nothing by default.
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Module for the DecisionExecutor class"""
+import asyncio
+import concurrent.futures
+import logging
+import re
+import time
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+THREAD = 'thread'
+PROCESS = 'process'
+MODES = (THREAD, PROCESS)
+
+#Choice that asks the server to pick the first legal option
+DEFAULT_CHOICE = 'default'
+
+TIME_LEFT_RE = re.compile(r'^Time left: (\d+) sec')
+YOU_HAVE_RE = re.compile(r'^You have (\d+) seconds? to make')
+PLAYER_HAS_RE = re.compile(r'^(.+) has (\d+) seconds? left')
+
+def parse_inactive(text):
+    """
+    Parses the text of an |inactive| line into the name of the player it's
+    about and the number of seconds they have left. The name is None when
+    the line is about the player receiving it.
+
+    Returns:
+        tuple : (name, seconds), or None if the line doesn't give a time.
+
+    Examples:
+        >>> parse_inactive('Time left: 150 sec this turn | 740 sec total')
+        (None, 150)
+        >>> parse_inactive('Zarel has 30 seconds left.')
+        ('Zarel', 30)
+        >>> parse_inactive('Battle timer is ON') is None
+        True
+    """
+    match = TIME_LEFT_RE.match(text) or YOU_HAVE_RE.match(text)
+    if match:
+        return None, int(match.group(1))
+    match = PLAYER_HAS_RE.match(text)
+    if match:
+        return match.group(1), int(match.group(2))
+    return None
+
+class DecisionExecutor:
+    """
+    Class used to make battle decisions in a thread or process pool, so slow
+    evaluations don't block the client's event loop. Each decision is given
+    a snapshot of the battle and its request, and must finish before the
+    battle timer runs out. If it doesn't, or it fails or returns an illegal
+    choice, the fallback choice is sent instead.
+
+    Notes:
+        In process mode, func must be defined at the top level of an
+        importable module so it can be pickled. A decision that misses its
+        deadline keeps running in its worker until it returns.
+
+    Args:
+        func (:obj:`callable`) : Function called as func(snapshot, request,
+            time_left) in the pool, where snapshot is a
+            showdown.snapshot.BattleSnapshot, request is a
+            showdown.request.BattleRequest and time_left is the number of
+            seconds the decision can take. Returns a choice string.
+        mode (:obj:`str`, optional) : 'thread' or 'process'. Defaults to
+            'thread'.
+        max_workers (:obj:`int`, optional) : The size of the pool. Defaults to
+            the executor's own default.
+        margin (:obj:`float`, optional) : The number of seconds kept in reserve
+            for sending the choice. Defaults to 2.
+        default_timeout (:obj:`float`, optional) : The number of seconds a
+            decision can take when the battle timer is off. Defaults to 30.
+        fallback (:obj:`callable`, optional) : Function called as
+            fallback(request) to get the choice sent when a decision fails.
+            Defaults to sending 'default', which has the server pick.
+
+    Attributes:
+        decisions (:obj:`int`) : The number of decisions made by func.
+        timeouts (:obj:`int`) : The number of decisions that missed their
+            deadline.
+        errors (:obj:`int`) : The number of decisions that raised or returned
+            an illegal choice.
+
+    Example:
+        executor = DecisionExecutor(search, mode='process', max_workers=4)
+        client = BattleClient(name, password, decision_executor=executor)
+    """
+    def __init__(self, func, mode=THREAD, max_workers=None, *, margin=2.0,
+                 default_timeout=30.0, fallback=None):
+        if mode not in MODES:
+            raise ValueError('mode must be one of {}, not {!r}'.format(
+                MODES, mode))
+        self.func = func
+        self.mode = mode
+        self.margin = margin
+        self.default_timeout = default_timeout
+        self.fallback = fallback
+        if mode == PROCESS:
+            self.pool = concurrent.futures.ProcessPoolExecutor(max_workers)
+        else:
+            self.pool = concurrent.futures.ThreadPoolExecutor(max_workers,
+                thread_name_prefix='showdown-decision')
+        self.decisions = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return '<{} mode={} decisions={}>'.format(self.__class__.__name__,
+            self.mode, self.decisions)
+
+    def time_left(self, battle):
+        """
+        Returns the number of seconds a decision for battle can take.
+        """
+        remaining = battle.time_left()
+        if remaining is None:
+            return self.default_timeout
+        return max(0, remaining - self.margin)
+
+    def fallback_choice(self, battle_request):
+        """
+        Returns the choice sent when a decision can't be made in time.
+        """
+        if self.fallback is not None:
+            return self.fallback(battle_request)
+        return DEFAULT_CHOICE
+
+    async def decide(self, battle):
+        """
+        |coro|
+
+        Makes a decision for the battle's current request in the pool and sends
+        it with battle.choose. Nothing is sent if the request is superseded
+        while the decision is being made.
+
+        Returns:
+            str : The choice sent, or None if nothing was sent.
+        """
+        battle_request = battle.request
+        if battle_request is None or battle_request.wait:
+            return None
+        time_left = self.time_left(battle)
+        snapshot = battle.snapshot()
+        loop = asyncio.get_event_loop()
+        started = time.monotonic()
+        future = loop.run_in_executor(self.pool, self.func, snapshot,
+            battle_request, time_left)
+        try:
+            choice = await asyncio.wait_for(asyncio.shield(future), time_left)
+            if not battle_request.is_legal(choice):
+                raise ValueError('illegal choice {!r}'.format(choice))
+            self.decisions += 1
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            future.add_done_callback(_consume_result)
+            logger.warning('Decision for {} missed its {:.1f}s deadline'
+                .format(battle.id, time_left))
+            choice = self.fallback_choice(battle_request)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception:
+            self.errors += 1
+            logger.exception('Decision for {} failed'.format(battle.id))
+            choice = self.fallback_choice(battle_request)
+        if battle.request is not battle_request:
+            logger.info('Dropping stale decision for {} made in {:.2f}s'
+                .format(battle.id, time.monotonic() - started))
+            return None
+        await battle.choose(choice, battle_request.rqid)
+        return choice
+
+    def stats(self):
+        """
+        Returns a dict of counters describing the executor's decisions.
+        """
+        return {
+            'decisions': self.decisions,
+            'timeouts': self.timeouts,
+            'errors': self.errors
+        }
+
+    def shutdown(self, wait=True):
+        """
+        Shuts down the executor's pool.
+        """
+        self.pool.shutdown(wait=wait)
+
+def _consume_result(future):
+    """
+    Retrieves the result of a late decision so its errors aren't reported as
+    never retrieved.
+    """
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Module for showdown's Event class"""
+from . import jsonlib
+
+#Input types whose JSON payload follows one parameter instead of none
+JSON_OFFSETS = {
+    'queryresponse': 1
+}
+
+class Event(str):
+    """
+    Class representing a single line of protocol input. An Event is the raw
+    line itself, and only remembers where its type token is. The line's
+    parameters are split, and its JSON payload decoded, the first time they
+    are accessed.
+
+    Args:
+        line (:obj:`str`) : A line of input received from the server.
+            Ex: '|c:|1554954415|+Zarel|Hello!'
+        room_id (:obj:`str`, optional) : The id of the room the line was sent
+            to. Defaults to the empty string.
+
+    Attributes:
+        room_id (:obj:`str`) : The id of the room the line was sent to.
+        type (:obj:`str`) : The type of the input. Lines without a '|' have the
+            type 'rawtext'. Ex: 'c:', 'j', 'switch'
+        params (:obj:`list`) : List of the parameters associated with the
+            input's type. Ex: ['1554954415', '+Zarel', 'Hello!']
+        json : The decoded JSON payload of the input. Ex: the dict sent with a
+            'request' or 'queryresponse' input.
+
+    Examples:
+        >>> event = Event('|c:|1554954415|+Zarel|Hello!|World', 'lobby')
+        >>> event.type
+        'c:'
+        >>> event.param(1)
+        '+Zarel'
+        >>> event.rest(2)
+        'Hello!|World'
+        >>> Event('Just some text').type
+        'rawtext'
+    """
+    __slots__ = ('room_id', '_type_start', '_type_end', '_end', '_type',
+                 '_params', '_json')
+
+    def __new__(cls, line, room_id=''):
+        self = str.__new__(cls, line)
+        self.room_id = room_id
+        end = len(line)
+        while end and line[end - 1].isspace():
+            end -= 1
+        self._end = end
+        start = line.find('|', 0, end)
+        if start == -1:
+            self._type_start = self._type_end = -1
+        else:
+            start += 1
+            type_end = line.find('|', start, end)
+            self._type_start = start
+            self._type_end = end if type_end == -1 else type_end
+        self._type = None
+        self._params = None
+        self._json = None
+        return self
+
+    def __repr__(self):
+        return '<{} ({}) {}>'.format(self.__class__.__name__, self.room_id,
+            str.__repr__(self))
+
+    def __reduce__(self):
+        return (self.__class__, (str(self), self.room_id))
+
+    @property
+    def type(self):
+        if self._type is None:
+            if self._type_start == -1:
+                self._type = 'rawtext'
+            else:
+                self._type = self[self._type_start:self._type_end].lower()
+        return self._type
+
+    @property
+    def params(self):
+        if self._params is None:
+            if self._type_start == -1:
+                self._params = [self.strip()]
+            elif self._type_end >= self._end:
+                self._params = []
+            else:
+                self._params = self[self._type_end + 1:self._end].split('|')
+        return self._params
+
+    def param(self, index, default=None):
+        """
+        Returns the parameter at index without splitting the whole line, or
+        default if there is no such parameter.
+        """
+        if self._params is not None or self._type_start == -1:
+            params = self.params
+            return params[index] if index < len(params) else default
+        pos, end = self._type_end + 1, self._end
+        if pos > end:
+            return default
+        for _ in range(index):
+            pos = self.find('|', pos, end) + 1
+            if not pos:
+                return default
+        param_end = self.find('|', pos, end)
+        return self[pos:end if param_end == -1 else param_end]
+
+    def rest(self, index=0):
+        """
+        Returns the raw text of every parameter from index onwards, including
+        the '|' characters between them.
+        """
+        if self._type_start == -1:
+            return self.strip() if index == 0 else ''
+        pos, end = self._type_end + 1, self._end
+        for _ in range(index):
+            if pos > end:
+                break
+            pos = self.find('|', pos, end) + 1
+            if not pos:
+                return ''
+        return self[pos:end]
+
+    @property
+    def json(self):
+        if self._json is None:
+            payload = self.rest(JSON_OFFSETS.get(self.type, 0))
+            self._json = jsonlib.loads(payload) if payload else {}
+        return self._json
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""Module for the FrozenBattle class"""
+import zlib
+from . import event, normalize, room, user
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+
+def compress(data, compression=ZLIB):
+    """
+    Compresses data with the given compression method.
+
+    Raises:
+        ValueError : Raised when the compression method isn't available.
+    """
+    if compression == ZLIB:
+        return zlib.compress(data, 6)
+    elif compression == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    raise ValueError('Compression `{}` is not available'.format(compression))
+
+def decompress(data, compression=ZLIB):
+    """
+    Decompresses data compressed with the given compression method.
+    """
+    if compression == ZLIB:
+        return zlib.decompress(data)
+    elif compression == ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError('Compression `{}` is not available'.format(compression))
+
+def compress_logs(logs, compression=ZLIB):
+    """
+    Compresses a room's logs into a single blob. Every line is terminated
+    by a newline, so empty lines survive the round trip.
+    """
+    return compress(''.join(line + '\n' for line in logs.lines()).encode(
+        'utf-8'), compression)
+
+def decompress_logs(data, compression=ZLIB):
+    """
+    Returns the list of lines compressed by compress_logs.
+
+    Examples:
+        >>> decompress_logs(compress_logs(room.Room('lobby').logs))
+        []
+    """
+    return decompress(data, compression).decode('utf-8').split('\n')[:-1]
+
+def bind_users(battle, client):
+    """
+    Gives a battle replayed without a client to client, replacing its users
+    with the ones from the client's registry.
+    """
+    users = client.users
+    battle.client = client
+    for bucket in battle.ranks.values():
+        for user_id, old_user in bucket.items():
+            bucket[user_id] = battle.userlist[user_id] = \
+                users.get(old_user.auth + old_user.name)
+    for player_id in ('p1', 'p2'):
+        player = getattr(battle, player_id)
+        if player is not None:
+            setattr(battle, player_id, users.get(player.auth + player.name))
+
+class FrozenBattle:
+    """
+    Class representing an ended battle as an immutable, compressed record.
+    The outcome, players and tier are kept as plain values, and the logs
+    are stored as a single compressed blob. Anything else has to be read
+    from the Battle returned by thaw, which rebuilds it from the logs.
+
+    Notes:
+        Lines received after a battle is frozen, such as chat after the
+        battle ends, are kept uncompressed and included in the logs. Joins,
+        leaves and renames among them still update the client's presence
+        index.
+
+    Attributes:
+        id (:obj:`str`) : The battle's id.
+        title (:obj:`str`) : The battle's title.
+        tier (:obj:`str`) : The battle's tier. Ex: 'gen7ou'
+        rated (:obj:`bool`) : True if the battle was rated.
+        rules (:obj:`tuple`) : The battle's rules.
+        p1_name, p2_name (:obj:`str`) : The names of the players.
+        winner_id, loser_id (:obj:`str` or None) : 'p1' or 'p2'. Both are None
+            if the battle was a tie.
+        turn (:obj:`int`) : The number of turns played.
+        compression (:obj:`str`) : The method used to compress the logs.
+        client (:obj:`showdown.client.Client`) : The client the battle belongs
+            to.
+    """
+    __slots__ = ('id', 'title', 'tier', 'rated', 'rules', 'p1_name',
+                 'p2_name', 'winner_id', 'loser_id', 'turn', 'init_time',
+                 'compression', 'client', 'max_logs', '_first_position',
+                 '_data', '_tail', '_battle')
+
+    ended = True
+
+    @classmethod
+    def freeze(cls, battle, compression=ZLIB):
+        """
+        Builds a FrozenBattle from an ended battle.
+
+        Args:
+            battle (:obj:`showdown.room.Battle`) : The battle to freeze.
+            compression (:obj:`str`, optional) : 'zlib' or 'zstd'. zstd needs
+                the zstandard package. Defaults to 'zlib'.
+        """
+        frozen = cls.__new__(cls)
+        frozen.id = battle.id
+        frozen.title = battle.title
+        frozen.tier = battle.tier
+        frozen.rated = battle.rated
+        frozen.rules = tuple(battle.rules)
+        frozen.p1_name = battle.p1.name if battle.p1 else None
+        frozen.p2_name = battle.p2.name if battle.p2 else None
+        frozen.winner_id, frozen.loser_id = battle.winner_id, battle.loser_id
+        frozen.turn = battle.turn
+        frozen.init_time = battle.init_time
+        frozen.compression = compression
+        frozen.client = battle.client
+        frozen.max_logs = battle.logs.maxlen
+        frozen._first_position = battle.first_log_position
+        frozen._data = compress_logs(battle.logs, compression)
+        frozen._tail = []
+        frozen._battle = None
+        return frozen
+
+    def __eq__(self, other):
+        return isinstance(other, (room.Room, FrozenBattle)) and \
+            self.id == other.id
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return '<{} `{}` {} bytes>'.format(self.__class__.__name__,
+            self.title, len(self._data))
+
+    @property
+    def p1(self):
+        return user.get_user(self.p1_name, client=self.client) \
+            if self.p1_name else None
+
+    @property
+    def p2(self):
+        return user.get_user(self.p2_name, client=self.client) \
+            if self.p2_name else None
+
+    @property
+    def winner(self):
+        return getattr(self, self.winner_id) if self.winner_id else None
+
+    @property
+    def loser(self):
+        return getattr(self, self.loser_id) if self.loser_id else None
+
+    @property
+    def logs(self):
+        """
+        List of the battle's logs as showdown.event.Event objects.
+        """
+        if self._battle is not None:
+            return list(self._battle.logs)
+        return [event.Event(line, self.id) for line in self.lines()]
+
+    def lines(self):
+        """
+        Returns a list of the battle's logs as plain strings.
+        """
+        return decompress_logs(self._data, self.compression) + self._tail
+
+    def add_content(self, content):
+        """
+        Adds a line received after the battle was frozen to its logs.
+        """
+        if self._battle is not None:
+            self._battle.add_content(content)
+            return
+        self._tail.append(str(content))
+        if self.client is not None:
+            if not isinstance(content, event.Event):
+                content = event.Event(content, self.id)
+            self._update_presence(content)
+
+    def _update_presence(self, inp_event):
+        """
+        Applies a join, leave or rename line to the client's presence index,
+        as Room.update does for rooms that aren't frozen.
+        """
+        inp_type = inp_event.type
+        presence = self.client.presence
+        if inp_type in ('j', 'join'):
+            presence.add(self._user_id(inp_event.param(0)), self.id)
+        elif inp_type in ('l', 'leave'):
+            presence.remove(self._user_id(inp_event.param(0)), self.id)
+        elif inp_type in ('n', 'name'):
+            user_id, old_id = self._user_id(inp_event.param(0)), \
+                inp_event.param(1)
+            presence.add(user_id, self.id)
+            if user_id != old_id:
+                presence.remove(old_id, self.id)
+
+    @staticmethod
+    def _user_id(user_str):
+        return normalize.name_to_id(normalize.split_auth(user_str)[1])
+
+    def thaw(self):
+        """
+        Returns a Battle rebuilt from the record's logs. The Battle is kept
+        until release is called, and lines added in the meantime go to it.
+        """
+        if self._battle is None:
+            lines = self.lines()
+            battle = room.Battle(self.id,
+                max_logs=self.max_logs or max(1, len(lines)))
+            battle.init_time = self.init_time
+            battle.log_count = self._first_position
+            #Replayed without the client, so its presence index isn't updated
+            for line in lines:
+                battle.add_content(line)
+            if self.client is not None:
+                bind_users(battle, self.client)
+            self._battle = battle
+            self._tail = []
+        return self._battle
+
+    def release(self):
+        """
+        Drops the Battle built by thaw. Lines added to it in the meantime are
+        compressed into the record first.
+        """
+        if self._battle is not None:
+            battle = self._battle
+            self._battle = None
+            self._data = compress_logs(battle.logs, self.compression)
+            self._first_position = battle.first_log_position
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Module for the pluggable JSON backend used throughout the showdown module.
+
+The fastest installed backend is used by default: orjson, then ujson, then
+the standard library's json module. Call set_backend to choose one
+explicitly. Always call these functions through the module (jsonlib.loads),
+so a backend change is picked up everywhere.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj).decode('utf-8')
+
+BACKENDS = {
+    'json': (json.loads, json.dumps)
+}
+if ujson is not None:
+    BACKENDS['ujson'] = (ujson.loads, ujson.dumps)
+if orjson is not None:
+    BACKENDS['orjson'] = (orjson.loads, _orjson_dumps)
+
+PREFERENCE = ('orjson', 'ujson', 'json')
+
+backend = None
+loads = None
+dumps = None
+
+def set_backend(name=None):
+    """
+    Sets the JSON backend used by the showdown module.
+
+    Args:
+        name (:obj:`str` or None, optional) : The name of the backend to use.
+            Ex: 'json', 'ujson', 'orjson'. If None, the fastest installed
+            backend is used. Defaults to None.
+
+    Raises:
+        ValueError : Raised when the requested backend isn't installed.
+    """
+    global backend, loads, dumps
+    if name is None:
+        name = next(name for name in PREFERENCE if name in BACKENDS)
+    if name not in BACKENDS:
+        raise ValueError('JSON backend `{}` is not installed. Available '
+            'backends: {}'.format(name, ', '.join(sorted(BACKENDS))))
+    backend = name
+    loads, dumps = BACKENDS[name]
+
+set_backend()
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""Module for the LogStore class used to hold a room's logs"""
+from array import array
+from . import event
+
+#Type tokens shared by every LogStore. Id 0 marks lines stored as is.
+TYPE_TOKENS = [None]
+TYPE_IDS = {}
+MAX_TYPE_TOKENS = 0xffff
+MAX_TOKEN_LENGTH = 32
+
+INITIAL_BYTES = 256
+INITIAL_SLOTS = 8
+
+def intern_type(token):
+    """
+    Returns the id of a line's raw type token, or 0 if it can't be interned.
+    """
+    token_id = TYPE_IDS.get(token)
+    if token_id is None:
+        if len(token) > MAX_TOKEN_LENGTH or \
+                len(TYPE_TOKENS) >= MAX_TYPE_TOKENS:
+            return 0
+        token_id = TYPE_IDS[token] = len(TYPE_TOKENS)
+        TYPE_TOKENS.append(token)
+    return token_id
+
+def encode_line(line):
+    """
+    Splits a line into its interned type id and the encoded remainder.
+
+    Examples:
+        >>> token_id, payload = encode_line('|move|p1a: Mew|Psychic')
+        >>> TYPE_TOKENS[token_id], payload
+        ('move', b'|p1a: Mew|Psychic')
+        >>> encode_line('Just some text')
+        (0, b'Just some text')
+    """
+    if line[:1] == '|':
+        token_end = line.find('|', 1)
+        if token_end == -1:
+            token_end = len(line)
+        token_id = intern_type(line[1:token_end])
+        if token_id:
+            return token_id, line[token_end:].encode('utf-8')
+    return 0, line.encode('utf-8')
+
+def decode_line(token_id, payload):
+    """
+    Rebuilds a line from its type id and encoded remainder.
+    """
+    if token_id:
+        return '|' + TYPE_TOKENS[token_id] + payload.decode('utf-8')
+    return payload.decode('utf-8')
+
+class LogStore:
+    """
+    Class used to store a room's logs compactly. Lines are kept encoded in a
+    single bytearray used as a ring buffer, with their type tokens interned,
+    and are only decoded back into showdown.event.Event objects when read.
+    The arena and its index start small and double as needed, so rooms with
+    few logs stay small.
+
+    Notes:
+        Behaves like a collections.deque with a maxlen: appending to a full
+        store drops its oldest line. If max_bytes is set, old lines are also
+        dropped to keep the arena within that size, and a line that is
+        larger on its own is cut short to fit.
+
+    Args:
+        maxlen (:obj:`int`) : The maximum number of lines kept.
+        room_id (:obj:`str`, optional) : The id of the room, given to the
+            Events built when reading lines.
+        max_bytes (:obj:`int` or None, optional) : The maximum size of the
+            arena. Defaults to None, which only limits the number of lines.
+
+    Attributes:
+        budget (:obj:`showdown.budget.LogBudget` or None) : The budget the
+            store's lines are charged to, if any.
+
+    Examples:
+        >>> logs = LogStore(2, 'lobby')
+        >>> for line in ('|j|Zarel', '|c|Zarel|Hi', '|l|Zarel'):
+        ...     logs.append(line)
+        >>> len(logs), [str(line) for line in logs]
+        (2, ['|c|Zarel|Hi', '|l|Zarel'])
+    """
+    __slots__ = ('maxlen', 'room_id', 'max_bytes', 'budget', '_arena',
+                 '_head', '_starts', '_lengths', '_types', '_first', '_count')
+
+    def __init__(self, maxlen=5000, room_id='', max_bytes=None):
+        self.maxlen = maxlen
+        self.room_id = room_id
+        self.max_bytes = max_bytes
+        self.budget = None
+        self._count = 0
+        self.clear()
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __repr__(self):
+        return '<{} `{}` {}/{} lines, {} bytes>'.format(
+            self.__class__.__name__, self.room_id, self._count, self.maxlen,
+            len(self._arena))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._read(i)
+
+    def __reversed__(self):
+        for i in range(self._count - 1, -1, -1):
+            yield self._read(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.window(*index.indices(self._count)[:2]) \
+                if index.step in (None, 1) else list(self)[index]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('LogStore index out of range')
+        return self._read(index)
+
+    def clear(self):
+        """
+        Removes every line and releases the arena.
+        """
+        if self.budget is not None and self._count:
+            self.budget.charge(self, -self._count, -sum(
+                self._lengths[self._slot(i)] for i in range(self._count)))
+        self._arena = bytearray(INITIAL_BYTES if self.max_bytes is None
+                                else min(INITIAL_BYTES, self.max_bytes))
+        self._head = 0
+        self._starts = array('I', bytes(INITIAL_SLOTS * 4))
+        self._lengths = array('I', self._starts)
+        self._types = array('H', bytes(INITIAL_SLOTS * 2))
+        self._first = 0
+        self._count = 0
+
+    def nbytes(self):
+        """
+        Returns the number of bytes allocated for the arena and its index.
+        """
+        return len(self._arena) + sum(len(index) * index.itemsize
+            for index in (self._starts, self._lengths, self._types))
+
+    def _slot(self, index):
+        return (self._first + index) % len(self._starts)
+
+    def _read(self, index):
+        slot = self._slot(index)
+        start = self._starts[slot]
+        return event.Event(decode_line(self._types[slot],
+            self._arena[start:start + self._lengths[slot]]), self.room_id)
+
+    def line(self, index):
+        """
+        Returns the line at index as a plain string.
+        """
+        slot = self._slot(index)
+        start = self._starts[slot]
+        return decode_line(self._types[slot],
+            self._arena[start:start + self._lengths[slot]])
+
+    def lines(self):
+        """
+        Yields every line as a plain string, oldest first.
+        """
+        for i in range(self._count):
+            yield self.line(i)
+
+    def window(self, start, stop):
+        """
+        Returns a list of the Events from index start up to index stop,
+        decoding only those lines.
+        """
+        return [self._read(i) for i in range(max(0, start),
+                                             min(stop, self._count))]
+
+    def popleft(self):
+        """
+        Removes and returns the oldest line.
+        """
+        if not self._count:
+            raise IndexError('pop from an empty LogStore')
+        oldest = self._read(0)
+        self._drop_oldest()
+        return oldest
+
+    def drop(self, count):
+        """
+        Removes the count oldest lines without decoding them.
+        """
+        for _ in range(min(count, self._count)):
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        size = self._lengths[self._first]
+        self._first = (self._first + 1) % len(self._starts)
+        self._count -= 1
+        if not self._count:
+            self._first = self._head = 0
+        if self.budget is not None:
+            self.budget.charge(self, -1, -size)
+
+    def _tail(self):
+        return self._starts[self._first] if self._count else self._head
+
+    def _reserve(self, size):
+        """
+        Returns the arena position where size bytes can be written, dropping
+        old lines or growing the arena as needed.
+        """
+        while True:
+            capacity = len(self._arena)
+            head, tail = self._head, self._tail()
+            #head only meets tail with lines stored when the arena is full,
+            #or when every line stored has an empty payload
+            if not self._count or head > tail or (head == tail and
+                    not any(self._lengths[self._slot(i)]
+                            for i in range(self._count))):
+                if capacity - head >= size:
+                    return head
+                if tail >= size:
+                    return 0
+            elif head < tail and tail - head >= size:
+                return head
+            if self.max_bytes is None or capacity < self.max_bytes:
+                new_capacity = max(capacity * 2, size)
+                if self.max_bytes is not None:
+                    new_capacity = min(new_capacity, self.max_bytes)
+                self._grow_arena(new_capacity)
+            else:
+                self._drop_oldest()
+
+    def _grow_arena(self, capacity):
+        arena = bytearray(capacity)
+        position = 0
+        for i in range(self._count):
+            slot = self._slot(i)
+            start, length = self._starts[slot], self._lengths[slot]
+            arena[position:position + length] = \
+                self._arena[start:start + length]
+            self._starts[slot] = position
+            position += length
+        self._arena = arena
+        self._head = position
+
+    def _grow_index(self):
+        slots = len(self._starts)
+        order = [self._slot(i) for i in range(self._count)]
+        new_slots = min(slots * 2, self.maxlen)
+        for name in ('_starts', '_lengths', '_types'):
+            index = getattr(self, name)
+            grown = array(index.typecode, [index[slot] for slot in order])
+            grown.extend(array(index.typecode,
+                bytes((new_slots - len(grown)) * index.itemsize)))
+            setattr(self, name, grown)
+        self._first = 0
+
+    def append(self, line):
+        """
+        Adds a line to the store, dropping the oldest line if it's full.
+        Lines whose payload is larger than max_bytes are truncated.
+        """
+        token_id, payload = encode_line(line)
+        if self.max_bytes is not None and len(payload) > self.max_bytes:
+            #Cut on a character boundary so the line still decodes
+            payload = payload[:self.max_bytes].decode('utf-8', 'ignore') \
+                .encode('utf-8')
+        if self._count >= self.maxlen:
+            self._drop_oldest()
+        elif self._count == len(self._starts):
+            self._grow_index()
+        size = len(payload)
+        position = self._reserve(size)
+        self._arena[position:position + size] = payload
+        self._head = position + size
+        slot = self._slot(self._count)
+        self._starts[slot] = position
+        self._lengths[slot] = size
+        self._types[slot] = token_id
+        self._count += 1
+        if self.budget is not None:
+            self.budget.charge(self, 1, size)
@@ -29,10 +29,12 @@ class ChatMessage:
             client (obj:`showdown.client.Client` or None) : The Client to be
                 used for the objects reply method
     """
+    __slots__ = ('room_id', 'timestamp', 'author', 'content', 'client')
+
     def __init__(self, room_id, timestamp, author_str, content, client=None):
         self.room_id = room_id
         self.timestamp = timestamp
-        self.author = user.User(author_str, client=client)
+        self.author = user.get_user(author_str, client=client)
         self.content = content
         self.client = client
 
@@ -76,10 +78,12 @@ class PrivateMessage:
         recipient_str (obj:`str`) : A string representing the name and rank of 
             the recipient
     """
+    __slots__ = ('timestamp', 'author', 'recipient', 'content', 'client')
+
     def __init__(self, author_str, recipient_str, content, client=None):
         self.timestamp = int(time.time())
-        self.author = user.User(author_str, client=client)
-        self.recipient = user.User(recipient_str, client=client)
+        self.author = user.get_user(author_str, client=client)
+        self.recipient = user.get_user(recipient_str, client=client)
         self.content = content
         self.client = client
 
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Module for turning names into ids and splitting auth prefixes off of them,
+as showdown does.
+"""
+import re
+import string
+from functools import lru_cache
+
+#Most names are ASCII, and are converted with a single str.translate call.
+#Other names go through the regex, which also handles Unicode case and
+#word characters.
+ASCII_ID_TABLE = {i: (chr(i).lower() if chr(i).isalnum() else None)
+                  for i in range(128)}
+NON_ID_RE = re.compile(r'(\W|_)')
+
+#Characters that start a name rather than an auth prefix. U+212A (KELVIN
+#SIGN) lowercases to 'k', so it counts as a letter.
+NAME_START = frozenset(string.ascii_letters + '\u212a')
+
+ID_CACHE_SIZE = 8192
+
+@lru_cache(maxsize=ID_CACHE_SIZE)
+def name_to_id(name):
+    """
+    Removes all non-letter or number characters from name, and lowercases.
+    Results are cached, since the same names are seen over and over.
+
+    Examples:
+        >>> name_to_id('Zarel ^_^')
+        'zarel'
+        >>> name_to_id('Ünown Ⅻ')
+        'ünownⅻ'
+    """
+    if name.isascii():
+        return name.translate(ASCII_ID_TABLE)
+    return NON_ID_RE.sub('', name.lower())
+
+def split_auth(user_str):
+    """
+    Splits a user string into its auth prefix and name. The auth is ' ' when
+    the string has no prefix.
+
+    Examples:
+        >>> split_auth('@Zarel')
+        ('@', 'Zarel')
+        >>> split_auth('Zarel')
+        (' ', 'Zarel')
+    """
+    if user_str and user_str[0] not in NAME_START:
+        return user_str[0], user_str[1:]
+    return ' ', user_str or ''
+
+def strip_prefix(s):
+    """
+    Strips off nonletter prefix from a string.
+
+    Examples:
+        >>> strip_prefix('~lobby')
+        'lobby'
+        >>> strip_prefix('+Argus2Spooky')
+        'Argus2Spooky'
+    """
+    if s and s[0] not in NAME_START:
+        s = s[1:]
+    return s
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Module for the ClientPool class"""
+import asyncio
+import aiohttp
+import logging
+from . import client, server
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+class ClientPool:
+    """
+    Class used to run many clients on one event loop. Clients in a pool share
+    a single Server object and aiohttp session, and their logins are
+    staggered so the login server isn't hit by every account at once.
+
+    Notes:
+        Use the pool as an async context manager. Clients added before
+        entering the pool are started when it is entered, and clients added
+        afterwards are started right away.
+
+    Args:
+        accounts (:obj:`list`, optional) : A list of (name, password) tuples
+            for the accounts to run. Defaults to an empty list.
+        client_class (:obj:`type`, optional) : The Client subclass used for
+            every account. Defaults to showdown.client.Client.
+        server_id (:obj:`str`, optional) : The id of the server the clients
+            will connect to. Defaults to 'showdown'.
+        server_host (:obj:`str`, optional) : The host name of the server. If
+            not specified, it is requested asynchronously on entering the pool.
+        autologin (:obj:`bool`, optional) : Bool denoting whether or not the
+            clients will automatically login. Defaults to True.
+        max_concurrent_logins (:obj:`int`, optional) : The maximum number of
+            clients connecting and logging in at once. Defaults to 2.
+        login_interval (:obj:`float`, optional) : The number of seconds to
+            wait after a client logs in before its login slot is reused.
+            Defaults to 1.0.
+        login_timeout (:obj:`float`, optional) : The number of seconds a client
+            can take to log in before its login slot is released anyway.
+            Defaults to 30.
+        **client_kwargs : Keyword arguments passed to every client.
+            Ex: max_room_logs=1000
+
+    Attributes:
+        clients (:obj:`list`) : The clients in the pool.
+        server (showdown.server.Server) : The Server object shared by the
+            pool's clients. Initialized to None until the pool is entered.
+        session (aiohttp.ClientSession) : The http session shared by the
+            pool's clients. Initialized to None until the pool is entered.
+
+    Example:
+        async def main():
+            async with ClientPool(accounts, client_class=LadderClient) as pool:
+                await pool.wait()
+    """
+    def __init__(self, accounts=(), client_class=client.Client, *,
+                 server_id='showdown', server_host=None, autologin=True,
+                 max_concurrent_logins=2, login_interval=1.0,
+                 login_timeout=30, **client_kwargs):
+        self.client_class = client_class
+        self.server_id = server_id
+        self.server_host = server_host
+        self.autologin = autologin
+        self.max_concurrent_logins = max_concurrent_logins
+        self.login_interval = login_interval
+        self.login_timeout = login_timeout
+        self.client_kwargs = client_kwargs
+        self.clients = []
+        self.server = None
+        self.session = None
+        self.loop = None
+        self._accounts = [(name, password, {}) for name, password in accounts]
+        self._login_slots = None
+        #Keyed by id(client), since clients compare equal by user id
+        self._tasks = {}
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def __repr__(self):
+        return '<{} clients={} server={}>'.format(
+            self.__class__.__name__, len(self.clients), self.server_id)
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_event_loop()
+        self._login_slots = asyncio.Semaphore(self.max_concurrent_logins)
+        self.session = aiohttp.ClientSession()
+        try:
+            host = self.server_host or \
+                await server.get_host_async(self.server_id, self.session)
+        except:
+            await self.session.close()
+            raise
+        self.server = server.Server(id=self.server_id, host=host)
+        self.server.set_session(self.session)
+        for name, password, kwargs in self._accounts:
+            self.add(name, password, **kwargs)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def add(self, name='', password='', **kwargs):
+        """
+        Creates a client for the given account using the pool's shared
+        infrastructure. If the pool has been entered, the client is started
+        right away.
+
+        Args:
+            name (:obj:`str`, optional) : The username of the account.
+            password (:obj:`str`, optional) : The password of the account.
+            **kwargs : Keyword arguments passed to the client, overriding the
+                pool's client_kwargs.
+
+        Returns:
+            showdown.client.Client : The created client, or None if the pool
+                hasn't been entered yet. In that case, the account and kwargs
+                are stored and its client is created when the pool is
+                entered.
+        """
+        if self.server is None:
+            self._accounts.append((name, password, kwargs))
+            return None
+        options = dict(self.client_kwargs, **kwargs)
+        new_client = self.client_class(name, password, loop=self.loop,
+            server_obj=self.server, session=self.session, **options)
+        self.clients.append(new_client)
+        self._tasks[id(new_client)] = asyncio.ensure_future(
+            self._run_client(new_client))
+        return new_client
+
+    async def _run_client(self, pool_client):
+        """
+        Runs pool_client, holding one of the pool's login slots until it has
+        logged in or login_timeout has passed.
+        """
+        run_task = None
+        try:
+            async with self._login_slots:
+                logger.info('Starting {}'.format(pool_client))
+                run_task = asyncio.ensure_future(
+                    pool_client.run(self.autologin))
+                ready_task = asyncio.ensure_future(pool_client.ready.wait())
+                try:
+                    await asyncio.wait([run_task, ready_task],
+                        timeout=self.login_timeout,
+                        return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    ready_task.cancel()
+                if not run_task.done():
+                    await asyncio.sleep(self.login_interval)
+            await run_task
+        finally:
+            if run_task is not None and not run_task.done():
+                run_task.cancel()
+            #Anonymous clients compare equal, so check identity instead
+            for i, other in enumerate(self.clients):
+                if other is pool_client:
+                    del self.clients[i]
+                    break
+            self._tasks.pop(id(pool_client), None)
+
+    async def wait(self):
+        """
+        |coro|
+
+        Waits until every client in the pool has disconnected.
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(),
+                return_exceptions=True)
+
+    async def close(self):
+        """
+        |coro|
+
+        Disconnects every client in the pool and closes the shared session.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.clients = []
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def metrics(self):
+        """
+        Returns a dict with entries of {client name : client metrics} for every
+        client in the pool. Anonymous clients are keyed by their index.
+        """
+        return {pool_client.name or str(i): pool_client.metrics()
+                for i, pool_client in enumerate(self.clients)}
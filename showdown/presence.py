@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Module for the PresenceIndex class"""
+from . import normalize
+
+EMPTY = frozenset()
+
+class PresenceIndex:
+    """
+    Class used by a client to know which of its rooms each user is in,
+    without scanning every room's userlist. Rooms update the index as they
+    process users, join, leave and rename lines.
+
+    Users can also be tracked, in which case every time they join or leave
+    one of the client's rooms is recorded, so the client can call its
+    on_tracked_join and on_tracked_leave hooks.
+
+    Notes:
+        Only rooms the client is in are indexed, including frozen battles.
+        When the client leaves a room, it's dropped from the index without
+        recording any changes.
+
+    Examples:
+        >>> presence = PresenceIndex()
+        >>> presence.track('Zarel')
+        >>> presence.add('zarel', 'lobby')
+        >>> presence.add('zarel', 'help')
+        >>> sorted(presence.rooms('Zarel'))
+        ['help', 'lobby']
+        >>> presence.pop_changes()
+        [(True, 'zarel', 'lobby'), (True, 'zarel', 'help')]
+    """
+    __slots__ = ('tracked', '_rooms', '_changes')
+
+    def __init__(self):
+        self.tracked = set()
+        self._rooms = {}
+        self._changes = []
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __contains__(self, user_id):
+        return user_id in self._rooms
+
+    def __repr__(self):
+        return '<{} {} users, {} tracked>'.format(self.__class__.__name__,
+            len(self._rooms), len(self.tracked))
+
+    def rooms(self, name):
+        """
+        Returns the set of ids of the client's rooms that the user is in.
+
+        Args:
+            name (:obj:`str`) : The user's name or id.
+
+        Returns:
+            set : The room ids. The set is the index's own, so it shouldn't
+                be modified.
+        """
+        return self._rooms.get(normalize.name_to_id(name), EMPTY)
+
+    def track(self, name):
+        """
+        Starts recording when the user joins or leaves one of the client's
+        rooms.
+        """
+        self.tracked.add(normalize.name_to_id(name))
+
+    def untrack(self, name):
+        """
+        Stops recording the user's joins and leaves.
+        """
+        self.tracked.discard(normalize.name_to_id(name))
+
+    def add(self, user_id, room_id):
+        """
+        Records that the user with user_id is in room_id.
+        """
+        rooms = self._rooms.get(user_id)
+        if rooms is None:
+            rooms = self._rooms[user_id] = set()
+        elif room_id in rooms:
+            return
+        rooms.add(room_id)
+        if user_id in self.tracked:
+            self._changes.append((True, user_id, room_id))
+
+    def remove(self, user_id, room_id):
+        """
+        Records that the user with user_id left room_id.
+        """
+        rooms = self._rooms.get(user_id)
+        if rooms is None or room_id not in rooms:
+            return
+        rooms.discard(room_id)
+        if not rooms:
+            del self._rooms[user_id]
+        if user_id in self.tracked:
+            self._changes.append((False, user_id, room_id))
+
+    def remove_room(self, room_id, user_ids=None):
+        """
+        Drops room_id from the rooms of every user in user_ids, as when the
+        client leaves it. If user_ids is None, every user is checked.
+        """
+        if user_ids is None:
+            user_ids = list(self._rooms)
+        for user_id in user_ids:
+            rooms = self._rooms.get(user_id)
+            if rooms is not None:
+                rooms.discard(room_id)
+                if not rooms:
+                    del self._rooms[user_id]
+
+    def pop_changes(self):
+        """
+        Returns and clears the list of (joined, user_id, room_id) tuples
+        recorded for tracked users.
+        """
+        changes, self._changes = self._changes, []
+        return changes
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Module for the token bucket rate limiter used by a client's sender"""
+import logging
+import time
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+#Showdown processes one message every 600ms for normal users, and drops
+#messages once more than a handful are buffered.
+THROTTLE_DELAY = .6
+THROTTLE_BUFFER = 5
+
+#Substrings of the notices the server sends when messages are throttled
+THROTTLE_MARKERS = (
+    'message-throttle-notice',
+    'typing too quickly',
+    'sending messages too fast',
+    'sending too many lines'
+)
+
+def is_throttle_notice(text):
+    """
+    Checks if text is one of the server's message throttle notices.
+
+    Examples:
+        >>> is_throttle_notice('<strong class="message-throttle-notice">'
+        ...     "Your message was not sent because you've been typing too "
+        ...     'quickly.</strong>')
+        True
+    """
+    text = text.lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+def line_room_id(line):
+    """
+    Returns the id of the room an output line is sent to.
+
+    Examples:
+        >>> line_room_id('lobby|hello')
+        'lobby'
+        >>> line_room_id('|/join lobby')
+        ''
+    """
+    return line.partition('|')[0]
+
+class TokenBucket:
+    """
+    Class representing a token bucket. Tokens refill continuously at rate
+    tokens per second up to capacity, and each message sent costs one token.
+
+    Args:
+        rate (:obj:`float`) : The number of tokens refilled per second.
+        capacity (:obj:`float`) : The maximum number of tokens in the bucket,
+            which is the largest burst of messages that can be sent at once.
+
+    Attributes:
+        rate (:obj:`float`) : The number of tokens refilled per second.
+        capacity (:obj:`float`) : The maximum number of tokens in the bucket.
+        tokens (:obj:`float`) : The number of tokens in the bucket as of the
+            last refill.
+    """
+    def __init__(self, rate, capacity):
+        if rate <= 0 or capacity < 1:
+            raise ValueError('rate should be positive and capacity should be '
+                             'at least 1')
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def __repr__(self):
+        return '<{} tokens={:.2f} rate={:.2f}>'.format(
+            self.__class__.__name__, self.tokens, self.rate)
+
+    def refill(self, now=None):
+        """
+        Adds the tokens accumulated since the last refill.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def wait_time(self, cost=1, now=None):
+        """
+        Returns the number of seconds until cost tokens are available.
+        """
+        self.refill(now)
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            return 0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost=1, now=None):
+        """
+        Removes cost tokens from the bucket. The bucket can go into debt, in
+        which case later wait times grow accordingly.
+        """
+        self.refill(now)
+        self.tokens -= cost
+
+    def drain(self, now=None):
+        """
+        Empties the bucket.
+        """
+        self.refill(now)
+        self.tokens = min(self.tokens, 0)
+
+class RateLimiter:
+    """
+    Class used to pace a client's outputs with a global token bucket and
+    optional per-room token buckets. When the server reports that messages
+    are being throttled, every rate is cut by backoff and the buckets are
+    drained. Rates then recover linearly, reaching their configured values
+    after recovery_time seconds without another throttle notice.
+
+    Args:
+        rate (:obj:`float`, optional) : Messages per second allowed across
+            all rooms. Defaults to 1 / THROTTLE_DELAY.
+        burst (:obj:`float`, optional) : The largest burst of messages sent at
+            once across all rooms. Defaults to THROTTLE_BUFFER.
+        room_rate (:obj:`float` or None, optional) : Messages per second
+            allowed in each room. None disables per-room buckets unless they
+            are added with set_room_rate. Defaults to None.
+        room_burst (:obj:`float`, optional) : The largest burst of messages
+            sent at once to each room. Defaults to burst.
+        backoff (:obj:`float`, optional) : The factor rates are multiplied by
+            on each throttle notice. Defaults to 0.5.
+        min_factor (:obj:`float`, optional) : The lowest fraction of the
+            configured rates the limiter backs off to. Defaults to 0.1.
+        recovery_time (:obj:`float`, optional) : The number of seconds taken
+            to recover from the lowest factor to the configured rates.
+            Defaults to 30.
+
+    Attributes:
+        bucket (showdown.ratelimit.TokenBucket) : The global bucket.
+        rooms (:obj:`dict`) : Dictionary with entries of {room_id :
+            TokenBucket} for rooms with their own bucket.
+        factor (:obj:`float`) : The fraction of the configured rates currently
+            in use.
+        throttled (:obj:`int`) : The number of throttle notices received.
+        last_wait (:obj:`float`) : The last wait computed for an output.
+        total_wait (:obj:`float`) : The total time spent waiting for tokens.
+    """
+    def __init__(self, rate=1 / THROTTLE_DELAY, burst=THROTTLE_BUFFER, *,
+                 room_rate=None, room_burst=None, backoff=.5, min_factor=.1,
+                 recovery_time=30):
+        self.base_rate = rate
+        self.bucket = TokenBucket(rate, burst)
+        self.room_rate = room_rate
+        self.room_burst = room_burst or burst
+        self.rooms = {}
+        self._room_rates = {}
+        self.backoff = backoff
+        self.min_factor = min_factor
+        self.recovery_time = recovery_time
+        self.factor = 1.0
+        self.throttled = 0
+        self.last_wait = 0
+        self.total_wait = 0
+        self._recovered = time.monotonic()
+
+    def __repr__(self):
+        return '<{} tokens={:.2f} factor={:.2f}>'.format(
+            self.__class__.__name__, self.bucket.tokens, self.factor)
+
+    def set_room_rate(self, room_id, rate, burst=None):
+        """
+        Gives the room specified by room_id its own bucket. Useful for rooms
+        with slowchat enabled.
+        """
+        self._room_rates[room_id] = (rate, burst or self.room_burst)
+        self.rooms[room_id] = TokenBucket(rate * self.factor,
+                                          burst or self.room_burst)
+
+    def remove_room(self, room_id):
+        """
+        Drops the bucket for the room specified by room_id.
+        """
+        self.rooms.pop(room_id, None)
+        self._room_rates.pop(room_id, None)
+
+    def _room_bucket(self, room_id):
+        bucket = self.rooms.get(room_id)
+        if bucket is None and self.room_rate is not None:
+            bucket = TokenBucket(self.room_rate * self.factor, self.room_burst)
+            self.rooms[room_id] = bucket
+        return bucket
+
+    def _set_factor(self, factor):
+        self.factor = factor
+        self.bucket.rate = self.base_rate * factor
+        for room_id, bucket in self.rooms.items():
+            rate = self._room_rates.get(room_id, (self.room_rate,))[0]
+            if rate is not None:
+                bucket.rate = rate * factor
+
+    def _recover(self, now):
+        if self.factor < 1:
+            elapsed = now - self._recovered
+            step = (1 - self.min_factor) / self.recovery_time
+            self._set_factor(min(1.0, self.factor + elapsed * step))
+        self._recovered = now
+
+    def costs(self, lines):
+        """
+        Returns a dict of {room_id : number of lines} for the given lines.
+        """
+        costs = {}
+        for line in lines:
+            room_id = line_room_id(line)
+            costs[room_id] = costs.get(room_id, 0) + 1
+        return costs
+
+    def available(self, now=None):
+        """
+        Returns the number of whole messages that can be sent right away
+        across all rooms.
+        """
+        self.bucket.refill(now)
+        return max(0, int(self.bucket.tokens))
+
+    def wait_time(self, lines, now=None):
+        """
+        Returns the number of seconds to wait before lines can be sent.
+        """
+        now = time.monotonic() if now is None else now
+        self._recover(now)
+        wait = self.bucket.wait_time(len(lines), now)
+        if self.rooms or self.room_rate is not None:
+            for room_id, cost in self.costs(lines).items():
+                bucket = self._room_bucket(room_id)
+                if bucket is not None:
+                    wait = max(wait, bucket.wait_time(cost, now))
+        self.last_wait = wait
+        return wait
+
+    def consume(self, lines, now=None):
+        """
+        Takes the tokens needed to send lines from the relevant buckets.
+        """
+        now = time.monotonic() if now is None else now
+        self.bucket.consume(len(lines), now)
+        if self.rooms or self.room_rate is not None:
+            for room_id, cost in self.costs(lines).items():
+                bucket = self._room_bucket(room_id)
+                if bucket is not None:
+                    bucket.consume(cost, now)
+
+    def throttle(self, room_id=None, now=None):
+        """
+        Slows the limiter down after the server reports that messages are
+        being sent too fast.
+        """
+        now = time.monotonic() if now is None else now
+        self._recover(now)
+        self.throttled += 1
+        self._set_factor(max(self.min_factor, self.factor * self.backoff))
+        self.bucket.drain(now)
+        bucket = self.rooms.get(room_id)
+        if bucket is not None:
+            bucket.drain(now)
+        logger.warning('Throttled by the server, backing off to {:.0%} of '
+                       'the configured rate'.format(self.factor))
+
+    def stats(self):
+        """
+        Returns a dict of the limiter's metrics.
+        """
+        self.bucket.refill()
+        return {
+            'tokens': self.bucket.tokens,
+            'rate': self.bucket.rate,
+            'factor': self.factor,
+            'last_wait': self.last_wait,
+            'total_wait': self.total_wait,
+            'throttled': self.throttled,
+            'room_buckets': len(self.rooms)
+        }
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""Module for decoding the |request| payloads sent to battle players"""
+import itertools
+from . import state
+
+#Move targets that need a target position in battles with several actives
+TARGETED = {'normal', 'any', 'adjacentAlly', 'adjacentFoe',
+            'adjacentAllyOrSelf'}
+ALLY_TARGETS = {'adjacentAlly', 'adjacentAllyOrSelf'}
+
+#Suffixes of move choices that use a once per battle mechanic
+GIMMICKS = (' mega', ' zmove', ' dynamax', ' terastallize')
+
+class MoveOption:
+    """
+    Class representing a move that an active pokemon can choose.
+
+    Attributes:
+        name (:obj:`str`) : The move's name. Ex: 'Thunderbolt'
+        id (:obj:`str`) : The move's id. Ex: 'thunderbolt'
+        pp (:obj:`int`) : The move's remaining pp.
+        max_pp (:obj:`int`) : The move's max pp.
+        target (:obj:`str`) : The move's target type. Ex: 'normal', 'self'
+        disabled (:obj:`bool`) : True if the move can't be chosen.
+    """
+    __slots__ = ('name', 'id', 'pp', 'max_pp', 'target', 'disabled')
+
+    def __init__(self, data):
+        self.name = data.get('move', '')
+        self.id = data.get('id', '')
+        self.pp = data.get('pp', 0)
+        self.max_pp = data.get('maxpp', 0)
+        self.target = data.get('target', '')
+        self.disabled = bool(data.get('disabled', False))
+
+    def __repr__(self):
+        return '<{} `{}` {}/{}>'.format(self.__class__.__name__, self.name,
+            self.pp, self.max_pp)
+
+class ActiveOptions:
+    """
+    Class representing the choices available to one active slot.
+
+    Attributes:
+        moves (:obj:`list`) : The slot's MoveOption objects.
+        can_mega (:obj:`bool`) : True if the pokemon can mega evolve.
+        z_moves (:obj:`list`) : For each move, True if it can be used as a
+            z-move.
+        can_dynamax (:obj:`bool`) : True if the pokemon can dynamax.
+        can_tera (:obj:`bool`) : True if the pokemon can terastallize.
+        trapped (:obj:`bool`) : True if the pokemon can't switch out.
+    """
+    __slots__ = ('moves', 'can_mega', 'z_moves', 'can_dynamax', 'can_tera',
+                 'trapped')
+
+    def __init__(self, data):
+        self.moves = [MoveOption(move) for move in data.get('moves', ())]
+        self.can_mega = bool(data.get('canMegaEvo') or
+                             data.get('canUltraBurst'))
+        z_moves = data.get('canZMove') or ()
+        self.z_moves = [bool(z_move) for z_move in z_moves]
+        self.can_dynamax = bool(data.get('canDynamax'))
+        self.can_tera = bool(data.get('canTerastallize'))
+        self.trapped = bool(data.get('trapped'))
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__,
+            [move.name for move in self.moves])
+
+class TeamMember:
+    """
+    Class representing one pokemon of the requesting player's team.
+
+    Attributes:
+        ident (:obj:`str`) : The pokemon's identifier. Ex: 'p1: Sparky'
+        name (:obj:`str`) : The pokemon's nickname. Ex: 'Sparky'
+        details (:obj:`str`) : The pokemon's details. Ex: 'Pikachu, L50, F'
+        condition (:obj:`str`) : The pokemon's condition. Ex: '45/110 par'
+        active (:obj:`bool`) : True if the pokemon is on the field.
+        fainted (:obj:`bool`) : True if the pokemon has fainted.
+        stats (:obj:`list`) : The pokemon's atk, def, spa, spd and spe stats.
+        moves (:obj:`list`) : The ids of the pokemon's moves.
+        item (:obj:`str`) : The id of the pokemon's item.
+        ability (:obj:`str`) : The id of the pokemon's ability.
+        reviving (:obj:`bool`) : True if the pokemon can be revived by the
+            current choice.
+    """
+    __slots__ = ('ident', 'name', 'details', 'condition', 'active',
+                 'fainted', 'stats', 'moves', 'item', 'ability', 'reviving')
+
+    def __init__(self, data):
+        self.ident = data.get('ident', '')
+        self.name = state.parse_ident(self.ident)[2]
+        self.details = data.get('details', '')
+        self.condition = data.get('condition', '')
+        self.active = bool(data.get('active'))
+        self.fainted = self.condition.endswith(' fnt')
+        stats = data.get('stats') or {}
+        self.stats = [stats.get(stat, 0) for stat in state.BOOSTS[:5]]
+        self.moves = list(data.get('moves', ()))
+        self.item = data.get('item', '')
+        self.ability = data.get('ability') or data.get('baseAbility', '')
+        self.reviving = bool(data.get('reviving'))
+
+    def __repr__(self):
+        return '<{} `{}` {}>'.format(self.__class__.__name__, self.name,
+            self.condition)
+
+class BattleRequest:
+    """
+    Class representing a decoded |request| payload. The choices available
+    to the player are computed once, the first time they're accessed.
+
+    Args:
+        data (:obj:`dict`) : The decoded request JSON.
+
+    Attributes:
+        rqid (:obj:`int` or None) : The request's id, sent back with choices.
+        side_id (:obj:`str`) : The id of the requesting player's side.
+        active (:obj:`list`) : ActiveOptions for each active slot.
+        team (:obj:`list`) : TeamMember objects for the player's team, in the
+            order used by switch choices.
+        force_switch (:obj:`list`) : For each slot, True if it must switch.
+        wait (:obj:`bool`) : True if the player has nothing to choose.
+        team_preview (:obj:`bool`) : True if the player is choosing a lead.
+        slot_choices (:obj:`list`) : For each slot, the list of choice strings
+            it can make. Ex: [['move 1', 'move 2', 'switch 3']]
+        legal_choices (:obj:`set`) : Every complete choice string the player
+            can send. Ex: {'move 1', 'move 2', 'switch 3'}. Only built when
+            read, since it grows with the product of the slots' choices.
+            Use is_legal to check a single choice.
+        min_switches (:obj:`int`) : The number of slots that have to switch.
+            On a force switch with fewer pokemon left to switch in than
+            forced slots, the forced slots can also pass, but only once every
+            pokemon left has been switched in.
+
+    Examples:
+        >>> request = BattleRequest({'rqid': 2, 'active': [{'moves': [
+        ...     {'move': 'Tackle', 'id': 'tackle', 'pp': 35, 'maxpp': 35,
+        ...      'target': 'normal'}]}], 'side': {'id': 'p1', 'pokemon': [
+        ...     {'ident': 'p1: A', 'condition': '9/9', 'active': True},
+        ...     {'ident': 'p1: B', 'condition': '9/9'}]}})
+        >>> sorted(request.legal_choices)
+        ['move 1', 'switch 2']
+    """
+    __slots__ = ('rqid', 'side_id', 'active', 'team', 'force_switch', 'wait',
+                 'team_preview', '_slot_choices', '_legal_choices')
+
+    def __init__(self, data):
+        side = data.get('side') or {}
+        self.rqid = data.get('rqid')
+        self.side_id = side.get('id', '')
+        self.active = [ActiveOptions(active)
+                       for active in data.get('active', ())]
+        self.team = [TeamMember(member) for member in side.get('pokemon', ())]
+        self.force_switch = [bool(force)
+                             for force in data.get('forceSwitch', ())]
+        self.wait = bool(data.get('wait'))
+        self.team_preview = bool(data.get('teamPreview'))
+        self._slot_choices = None
+        self._legal_choices = None
+
+    def __repr__(self):
+        return '<{} {} rqid={}>'.format(self.__class__.__name__, self.side_id,
+            self.rqid)
+
+    @property
+    def slot_choices(self):
+        if self._slot_choices is None:
+            self._slot_choices = self._compute_slot_choices()
+        return self._slot_choices
+
+    @property
+    def min_switches(self):
+        if not self.force_switch:
+            return 0
+        reviving = any(member.reviving for member in self.team)
+        return min(sum(self.force_switch), len(self._switches(reviving)))
+
+    @property
+    def legal_choices(self):
+        if self._legal_choices is None:
+            self._legal_choices = self._compute_legal_choices()
+        return self._legal_choices
+
+    def is_legal(self, choice):
+        """
+        Returns True if choice is a legal choice string for this request.
+        Each slot's part is checked on its own, so the full set of legal
+        choices is never built.
+
+        Examples:
+            >>> request = BattleRequest({'forceSwitch': [True, True],
+            ...     'side': {'pokemon': [{'condition': '9/9', 'active': True},
+            ...     {'condition': '9/9', 'active': True},
+            ...     {'condition': '9/9'}, {'condition': '9/9'}]}})
+            >>> request.is_legal('switch 3, switch 4')
+            True
+            >>> request.is_legal('switch 3, switch 3')
+            False
+
+            With a single pokemon left, one of the slots passes.
+
+            >>> request = BattleRequest({'forceSwitch': [True, True],
+            ...     'side': {'pokemon': [{'condition': '9/9', 'active': True},
+            ...     {'condition': '9/9', 'active': True},
+            ...     {'condition': '9/9'}, {'condition': '0 fnt'}]}})
+            >>> request.is_legal('switch 3, pass')
+            True
+            >>> request.is_legal('pass, pass')
+            False
+        """
+        slot_choices = self.slot_choices
+        parts = [part.strip() for part in choice.split(',')]
+        if not slot_choices or len(parts) != len(slot_choices):
+            return False
+        for part, choices in zip(parts, slot_choices):
+            if part not in choices:
+                return False
+        return combination_is_legal(parts, self.min_switches)
+
+    def _switches(self, reviving=False):
+        """
+        Returns the switch choices available to any slot.
+        """
+        return ['switch {}'.format(i) for i, member in enumerate(self.team, 1)
+                if not member.active and member.fainted == reviving]
+
+    def _targets(self, move, slot):
+        """
+        Returns the target suffixes for move when used from slot.
+        """
+        num_slots = len(self.active)
+        if num_slots < 2 or move.target not in TARGETED:
+            return ['']
+        allies = ['-{}'.format(i) for i in range(1, num_slots + 1)
+                  if i != slot + 1 or move.target == 'adjacentAllyOrSelf']
+        if move.target in ALLY_TARGETS:
+            return [' ' + ally for ally in allies]
+        foes = [str(i) for i in range(1, num_slots + 1)]
+        if move.target != 'adjacentFoe':
+            foes += allies
+        return [' ' + target for target in foes]
+
+    def _compute_slot_choices(self):
+        if self.wait:
+            return []
+        if self.team_preview:
+            return [['team {}'.format(i)
+                     for i in range(1, len(self.team) + 1)]]
+        if self.force_switch:
+            reviving = any(member.reviving for member in self.team)
+            switches = self._switches(reviving)
+            #Forced slots pass once there's nothing left to switch in
+            if len(switches) < sum(self.force_switch):
+                switches = switches + ['pass']
+            return [switches if force else ['pass']
+                    for force in self.force_switch]
+        switches = self._switches()
+        slot_choices = []
+        for slot, options in enumerate(self.active):
+            active_member = self.team[slot] if slot < len(self.team) else None
+            if active_member is not None and active_member.fainted:
+                slot_choices.append(['pass'])
+                continue
+            choices = []
+            for i, move in enumerate(options.moves, 1):
+                if move.disabled:
+                    continue
+                for target in self._targets(move, slot):
+                    base = 'move {}'.format(i)
+                    choices.append(base + target)
+                    if options.can_mega:
+                        choices.append(base + target + ' mega')
+                    if i <= len(options.z_moves) and options.z_moves[i - 1]:
+                        choices.append(base + target + ' zmove')
+                    if options.can_dynamax:
+                        choices.append(base + target + ' dynamax')
+                    if options.can_tera:
+                        choices.append(base + target + ' terastallize')
+            if not options.trapped:
+                choices.extend(switches)
+            slot_choices.append(choices or ['pass'])
+        return slot_choices
+
+    def _compute_legal_choices(self):
+        slot_choices = self.slot_choices
+        if not slot_choices:
+            return set()
+        if len(slot_choices) == 1:
+            return set(slot_choices[0])
+        legal = set()
+        min_switches = self.min_switches
+        for combination in itertools.product(*slot_choices):
+            if combination_is_legal(combination, min_switches):
+                legal.add(', '.join(combination))
+        return legal
+
+def combination_is_legal(combination, min_switches=0):
+    """
+    Returns False if a combination of slot choices switches to the same
+    pokemon twice, uses a once per battle mechanic twice, or switches fewer
+    than min_switches times.
+
+    Examples:
+        >>> combination_is_legal(('switch 3', 'switch 3'))
+        False
+        >>> combination_is_legal(('move 1 mega', 'move 2'))
+        True
+        >>> combination_is_legal(('switch 3', 'pass'), min_switches=2)
+        False
+    """
+    switches = [choice for choice in combination
+                if choice.startswith('switch')]
+    if len(switches) != len(set(switches)) or len(switches) < min_switches:
+        return False
+    for gimmick in GIMMICKS:
+        if sum(choice.endswith(gimmick) for choice in combination) > 1:
+            return False
+    return True
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 """Module for Room and Battle objects"""
 
+import logging
 import math
 import time
-from collections import deque
-from . import utils, user
+from . import utils, user, event, logstore, state, snapshot, request, decision, \
+    choice as choice_module
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+#Auth prefixes of room and global staff
+STAFF_RANKS = ('~', '&', '#', '@', '%')
 
 class Room:
     """
@@ -19,21 +26,34 @@ class Room:
         max_logs (:obj:`int`) : The maximum number of logs to be included in
             the Room object. Logs include chat messages, room intros, tour.
             updates, etc...
+        logs (optional) : The store used for the room's logs, such as a
+            showdown.spill.SpillLogStore. Defaults to a LogStore holding
+            max_logs lines.
 
     Attributes:
         id (:obj:`str`) : The room's id.
-        logs (:obj:`collections.deque`) : Queue containing all of the logs
-            associated with the room.
+        logs (:obj:`showdown.logstore.LogStore`) : Compact queue containing
+            all of the logs associated with the room. Lines are read back as
+            showdown.event.Event objects.
         userlist (:obj:`dict`) : Dictionary with entries of {user_id : User}
             containing all the room's current users.
+        ranks (:obj:`dict`) : Dictionary with entries of
+            {auth : {user_id : User}} grouping the room's current users by the
+            auth prefix they have in this room. Ex: {'@': {...}, ' ': {...}}
         client (:obj:`showdown.client.Client`) : The client to be
             used with the Room object's utility functions. Defaults to None.
         title (:obj:`str`) : The room's title. Ex: 'Lobby', 'Monotype'
+        log_count (:obj:`int`) : The number of logs ever added to the room,
+            including the ones dropped from logs since.
     """
-    def __init__(self, room_id, client=None, max_logs=5000):
+    def __init__(self, room_id, client=None, max_logs=5000, logs=None):
         self.id = room_id
-        self.logs = deque(maxlen=max_logs)
+        self.logs = logs if logs is not None else \
+            logstore.LogStore(max_logs, room_id)
+        self.log_count = 0
         self.userlist = {}
+        self.ranks = {}
+        self._user_ranks = {}
         self.client = client
         self.title = None
         self.init_time = time.time()
@@ -53,55 +73,149 @@ class Room:
     def add_content(self, content):
         """
         Adds content to the Room object's logs attribute. Content is also
-        parsed and used to update the Room's state through the update method.
+        used to update the Room's state through the update method.
+
+        Args:
+            content (:obj:`showdown.event.Event` or :obj:`str`) : The input to
+                add. Strings are parsed into an Event first, while Events
+                are stored and shared as is.
         """
+        if not isinstance(content, event.Event):
+            content = event.Event(content, self.id)
         self.logs.append(content)
-        inp_type, params = utils.parse_text_input(content)
-        self.update(inp_type, *params)
+        self.log_count += 1
+        self.update(content)
 
-    def _add_user(self, user_str):
+    @property
+    def first_log_position(self):
+        """
+        The position of logs[0] among every log ever added to the room.
         """
-        Adds a user object built from user_str to the Room's roomlist
+        return self.log_count - len(self.logs)
+
+    def log_range(self, start, stop):
+        """
+        Returns a list of the logs between two positions, where positions
+        count every log ever added to the room. Logs that have already been
+        dropped from the logs are left out. Only the requested logs are
+        decoded.
+
+        Args:
+            start (:obj:`int`) : The position of the first log.
+            stop (:obj:`int` or None) : The position after the last log. None
+                means up to the latest log.
         """
-        new_user = user.User(user_str, client=self.client)
-        self.userlist[new_user.id] = new_user
+        offset = self.first_log_position
+        stop = len(self.logs) if stop is None else stop - offset
+        return self.logs.window(start - offset, stop)
+
+    def _add_user(self, user_str):
+        """
+        Adds the user object for user_str to the Room's roomlist
+        """
+        new_user = user.get_user(user_str, client=self.client)
+        user_id, auth = new_user.id, new_user.auth
+        self.userlist[user_id] = new_user
+        old_auth = self._user_ranks.get(user_id)
+        if old_auth != auth:
+            if old_auth is not None:
+                self._unrank(user_id, old_auth)
+            self._user_ranks[user_id] = auth
+        bucket = self.ranks.get(auth)
+        if bucket is None:
+            bucket = self.ranks[auth] = {}
+        bucket[user_id] = new_user
+        if self.client is not None:
+            self.client.presence.add(user_id, self.id)
+        return new_user
 
     def _remove_user(self, user_id):
         """
         Removes a user object built from user_str from the Room's roomlist
         """
         self.userlist.pop(user_id, None)
+        auth = self._user_ranks.pop(user_id, None)
+        if auth is not None:
+            self._unrank(user_id, auth)
+        if self.client is not None:
+            self.client.presence.remove(user_id, self.id)
+
+    def _unrank(self, user_id, auth):
+        bucket = self.ranks[auth]
+        del bucket[user_id]
+        if not bucket:
+            del self.ranks[auth]
+
+    def rank_count(self, *auths):
+        """
+        Returns the number of users in the room with any of the given auth
+        prefixes.
+
+        Examples:
+            >>> lobby = Room('lobby')
+            >>> lobby.add_content('|users|3,@Lux, Zarel,%Kris')
+            >>> lobby.rank_count('@', '%'), lobby.rank_count('+')
+            (2, 0)
+        """
+        ranks = self.ranks
+        return sum(len(ranks[auth]) for auth in auths if auth in ranks)
+
+    def users_with_rank(self, *auths):
+        """
+        Yields the users in the room with any of the given auth prefixes.
+        """
+        for auth in auths:
+            yield from self.ranks.get(auth, {}).values()
 
-    def update(self, inp_type, *params):
+    def staff_count(self):
+        """
+        Returns the number of users in the room whose auth is one of
+        STAFF_RANKS.
+        """
+        return self.rank_count(*STAFF_RANKS)
+
+    def staff(self):
+        """
+        Yields the users in the room whose auth is one of STAFF_RANKS.
+        """
+        return self.users_with_rank(*STAFF_RANKS)
+
+    def update(self, inp_event):
         """
         Updates the Room's state from input. This his method isn't intended to
         be called directly, but rather through a client's receiver method.
+
+        Args:
+            inp_event (:obj:`showdown.event.Event`) : The input to update the
+                Room's state from. Its params are only split if needed.
         """
+        inp_type = inp_event.type
 
         #Title set
         if inp_type == 'title':
-            self.title = params[0]
+            self.title = inp_event.param(0)
 
         #Userlist init
-        if inp_type == 'users':
-            user_strs = params[0].split(',')[1:]
+        elif inp_type == 'users':
+            user_strs = inp_event.param(0).split(',')[1:]
             for user_str in user_strs:
                 self._add_user(user_str)
 
         #User name change
-        elif inp_type == 'n':
-            user_str, old_id = params
-            self._remove_user(old_id)
-            self._add_user(user_str)
+        elif inp_type == 'n' or inp_type == 'name':
+            user_str, old_id = inp_event.param(0), inp_event.param(1)
+            #Renames that keep the same id only change the display name
+            if self._add_user(user_str).id != old_id:
+                self._remove_user(old_id)
 
         #User leave
-        elif inp_type == 'l':
-            user_id = utils.name_to_id(params[0])
+        elif inp_type == 'l' or inp_type == 'leave':
+            user_id = utils.name_to_id(inp_event.param(0))
             self._remove_user(user_id)
 
         #User join
-        elif inp_type == 'j':
-            user_str = params[0]
+        elif inp_type == 'j' or inp_type == 'join':
+            user_str = inp_event.param(0)
             self._add_user(user_str)
 
     @utils.require_client
@@ -150,14 +264,21 @@ class Battle(Room):
         max_logs (:obj:`int`) : The maximum number of logs to be included in
             the Room object. Logs include chat messages, room intros, tour.
             updates, etc...
+        logs (optional) : The store used for the room's logs, such as a
+            showdown.spill.SpillLogStore. Defaults to a LogStore holding
+            max_logs lines.
 
 
     Inherited attributes:
         id (:obj:`str`) : The room's id.
-        logs (:obj:`collections.deque`) : Queue containing all of the logs
-            associated with the room.
+        logs (:obj:`showdown.logstore.LogStore`) : Compact queue containing
+            all of the logs associated with the room. Lines are read back as
+            showdown.event.Event objects.
         userlist (:obj:`dict`) : Dictionary with entries of {user_id : User}
             containing all the room's current users.
+        ranks (:obj:`dict`) : Dictionary with entries of
+            {auth : {user_id : User}} grouping the room's current users by the
+            auth prefix they have in this room. Ex: {'@': {...}, ' ': {...}}
         client (:obj:`showdown.client.Client`) : The client to be
             used with the Room object's utility functions. Defaults to None.
         title (:obj:`str`) : The room's title. Ex: 'Zarel vs. Aegisium Z'
@@ -180,9 +301,31 @@ class Battle(Room):
         loser_id (:obj:`str`) : String representing the match id of the
             battle's loser. Ex: 'p1', 'p2'
         ended (:obj:`bool`) : True if a player has won the match, else False
+        turn (:obj:`int`) : The current turn number. 0 before the first turn.
+        gen (:obj:`int` or None) : The battle's generation.
+        game_type (:obj:`str`) : The battle's game type. Ex: 'singles',
+            'doubles'
+        sides (:obj:`dict`) : Dictionary with entries of {side_id : Side} for
+            every side in the battle. Ex: {'p1': <Side p1>, 'p2': <Side p2>}
+        weather (:obj:`str` or None) : The current weather. Ex: 'RainDance'
+        fields (:obj:`set`) : The field effects currently active.
+            Ex: {'Electric Terrain', 'Trick Room'}
+        turn_positions (:obj:`list`) : The log position at which each turn
+            starts, indexed by turn number. Turn 0 covers the logs before the
+            first |turn| line. See Room.log_range.
+        request (showdown.request.BattleRequest or None) : The latest request
+            sent to the client, if it's one of the players.
+        timer_deadline (:obj:`float` or None) : The time.monotonic() time at
+            which the client's battle timer runs out, from |inactive| lines.
+            None if the timer is off.
+
+    Notes:
+        The state attributes are updated incrementally as each line is
+        received, so reading them never requires rescanning the logs.
     """
-    def __init__(self, room_id, client=None, max_logs=5000):
-        Room.__init__(self, room_id, client=client, max_logs=max_logs)
+    def __init__(self, room_id, client=None, max_logs=5000, logs=None):
+        Room.__init__(self, room_id, client=client, max_logs=max_logs,
+            logs=logs)
         self.rules = []
         self.p1, self.p2 = None, None
         self.rated = False
@@ -190,26 +333,121 @@ class Battle(Room):
         self.tier = None
         self.winner, self.loser = None, None
         self.winner_id, self.loser_id = None, None
+        self.turn = 0
+        self.gen = None
+        self.game_type = 'singles'
+        self.sides = {'p1': state.Side('p1'), 'p2': state.Side('p2')}
+        self.weather = None
+        self.fields = set()
+        self.turn_positions = [0]
+        self.request = None
+        self.timer_deadline = None
+        self._interner = None
+
+    def get_side(self, side_id):
+        """
+        Returns the Side object for side_id, creating it if needed.
+        """
+        side = self.sides.get(side_id)
+        if side is None:
+            side = self.sides[side_id] = state.Side(side_id)
+        return side
+
+    def get_pokemon(self, ident, details=''):
+        """
+        Returns the Pokemon object for a pokemon identifier, creating it if
+        needed. Ex: 'p1a: Pikachu'
+        """
+        side_id, _, name = state.parse_ident(ident)
+        return self.get_side(side_id).get(name, details)
+
+    def turn_logs(self, first, last=None):
+        """
+        Returns a list of the logs from the start of turn first to the end of
+        turn last, without scanning the rest of the logs. Logs that have been
+        dropped from the logs are left out.
+
+        Args:
+            first (:obj:`int`) : The first turn to include.
+            last (:obj:`int`, optional) : The last turn to include. Defaults to
+                first.
+
+        Examples:
+            >>> battle = Battle('battle-gen7ou-1')
+            >>> for line in ('|start', '|turn|1', '|move|p1a: Mew|Psychic|',
+            ...              '|turn|2'):
+            ...     battle.add_content(line)
+            >>> [str(line) for line in battle.turn_logs(1)]
+            ['|turn|1', '|move|p1a: Mew|Psychic|']
+        """
+        last = first if last is None else last
+        positions = self.turn_positions
+        if first > last or first >= len(positions):
+            return []
+        stop = positions[last + 1] if last + 1 < len(positions) else None
+        return self.log_range(positions[max(0, first)], stop)
 
-    def update(self, inp_type, *params): #TODO: Fix this up
+    def recent_turns(self, num_turns):
+        """
+        Returns a list of the logs of the last num_turns turns, including the
+        current one.
+        """
+        return self.turn_logs(max(0, self.turn - num_turns + 1), self.turn)
+
+    def time_left(self):
+        """
+        Returns the number of seconds left on the client's battle timer, or
+        None if the timer is off.
+        """
+        if self.timer_deadline is None:
+            return None
+        return max(0, self.timer_deadline - time.monotonic())
+
+    def snapshot(self):
+        """
+        Returns a showdown.snapshot.BattleSnapshot of the battle's current
+        state. Snapshots of the same battle share one interner, so their ids
+        are comparable.
+        """
+        if self._interner is None:
+            self._interner = snapshot.Interner()
+        return snapshot.BattleSnapshot.from_battle(self, self._interner)
+
+    @property
+    def active(self):
+        """
+        List of every active Pokemon in the battle, in side order.
+        """
+        return [pokemon for side in self.sides.values()
+                for pokemon in side.active if pokemon is not None]
+
+    def update(self, inp_event):
         """
         Updates the Room's state from input. This his method isn't intended to
         be called directly, but rather through a client's receiver method.
         """
-        Room.update(self, inp_type, *params)
-        if inp_type == 'player':
-            player_id, name = params[0], params[1]
+        Room.update(self, inp_event)
+        inp_type = inp_event.type
+        state_handler = self._state_handlers.get(inp_type)
+        if state_handler is not None:
+            try:
+                state_handler(self, inp_event)
+            except (TypeError, ValueError, AttributeError):
+                logger.warning('Could not track state from {!r} in {}'
+                    .format(str(inp_event), self.id))
+        elif inp_type == 'player':
+            player_id, name = inp_event.param(0), inp_event.param(1)
             if not name or player_id not in ('p1', 'p2'):
                 return
-            setattr(self, player_id, user.User(name, client=self.client))
+            setattr(self, player_id, user.get_user(name, client=self.client))
         elif inp_type == 'rated':
             self.rated = True
         elif inp_type == 'tier':
-            self.tier = utils.name_to_id(params[0])
+            self.tier = utils.name_to_id(inp_event.param(0))
         elif inp_type == 'rule':
-            self.rules.append(params[0])
+            self.rules.append(inp_event.param(0))
         elif inp_type == 'win':
-            winner_name = params[0]
+            winner_name = inp_event.param(0)
             if self.p1.name_matches(winner_name):
                 self.winner, self.winner_id = self.p1, 'p1'
                 self.loser, self.loser_id = self.p2, 'p2'
@@ -217,6 +455,218 @@ class Battle(Room):
                 self.winner, self.winner_id = self.p2, 'p2'
                 self.loser, self.loser_id = self.p1, 'p1'
             self.ended = True
+        elif inp_type == 'tie':
+            self.ended = True
+
+    def _update_switch(self, inp_event):
+        side_id, slot, name = state.parse_ident(inp_event.param(0))
+        details = inp_event.param(1, '')
+        side = self.get_side(side_id)
+        pokemon = side.get(name, details)
+        if details:
+            pokemon.set_details(details)
+        condition = inp_event.param(2)
+        if condition:
+            pokemon.set_condition(condition)
+        side.switch_in(state.slot_index(slot), pokemon)
+
+    def _update_details(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).set_details(inp_event.param(1))
+
+    def _update_condition(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).set_condition(inp_event.param(1))
+
+    def _update_status(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).status = inp_event.param(1)
+
+    def _update_cure_status(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).status = ''
+
+    def _update_cure_team(self, inp_event):
+        side_id, _, _ = state.parse_ident(inp_event.param(0))
+        for pokemon in self.get_side(side_id).pokemon.values():
+            if pokemon.status != 'fnt':
+                pokemon.status = ''
+
+    def _update_faint(self, inp_event):
+        pokemon = self.get_pokemon(inp_event.param(0))
+        pokemon.hp, pokemon.status = 0, 'fnt'
+
+    def _update_boost(self, inp_event):
+        amount = int(inp_event.param(2, 0))
+        if inp_event.type == '-unboost':
+            amount = -amount
+        self.get_pokemon(inp_event.param(0)).boost(inp_event.param(1), amount)
+
+    def _update_set_boost(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).set_boost(inp_event.param(1),
+            int(inp_event.param(2, 0)))
+
+    def _update_clear_boost(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).clear_boosts()
+
+    def _update_clear_all_boost(self, inp_event):
+        for pokemon in self.active:
+            pokemon.clear_boosts()
+
+    def _update_clear_signed_boost(self, inp_event):
+        boosts = self.get_pokemon(inp_event.param(0)).boosts
+        positive = inp_event.type == '-clearpositiveboost'
+        for i, boost in enumerate(boosts):
+            if (boost > 0) == positive and boost:
+                boosts[i] = 0
+
+    def _update_invert_boost(self, inp_event):
+        boosts = self.get_pokemon(inp_event.param(0)).boosts
+        boosts[:] = [-boost for boost in boosts]
+
+    def _update_copy_boost(self, inp_event):
+        source = self.get_pokemon(inp_event.param(0))
+        target = self.get_pokemon(inp_event.param(1))
+        target.boosts[:] = source.boosts
+
+    def _update_swap_boost(self, inp_event):
+        source = self.get_pokemon(inp_event.param(0))
+        target = self.get_pokemon(inp_event.param(1))
+        stats = inp_event.param(2)
+        if stats:
+            indexes = [state.BOOST_INDEX[stat] for stat in stats.split(', ')
+                       if stat in state.BOOST_INDEX]
+        else:
+            indexes = range(len(state.BOOSTS))
+        for i in indexes:
+            source.boosts[i], target.boosts[i] = \
+                target.boosts[i], source.boosts[i]
+
+    def _update_volatile(self, inp_event):
+        pokemon = self.get_pokemon(inp_event.param(0))
+        volatile = utils.name_to_id(state.effect_name(inp_event.param(1)))
+        if inp_event.type == '-start':
+            pokemon.volatiles.add(volatile)
+        else:
+            pokemon.volatiles.discard(volatile)
+
+    def _update_item(self, inp_event):
+        pokemon = self.get_pokemon(inp_event.param(0))
+        pokemon.item = '' if inp_event.type == '-enditem' \
+            else inp_event.param(1)
+
+    def _update_ability(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).ability = inp_event.param(1)
+
+    def _update_move(self, inp_event):
+        self.get_pokemon(inp_event.param(0)).add_move(inp_event.param(1))
+
+    def _update_weather(self, inp_event):
+        weather = inp_event.param(0)
+        self.weather = None if weather == 'none' else weather
+
+    def _update_field(self, inp_event):
+        effect = state.effect_name(inp_event.param(0))
+        if inp_event.type == '-fieldstart':
+            self.fields.add(effect)
+        else:
+            self.fields.discard(effect)
+
+    def _update_side_condition(self, inp_event):
+        side_id, _, _ = state.parse_ident(inp_event.param(0))
+        conditions = self.get_side(side_id).conditions
+        condition = state.effect_name(inp_event.param(1))
+        if inp_event.type == '-sidestart':
+            conditions[condition] = conditions.get(condition, 0) + 1
+        else:
+            conditions.pop(condition, None)
+
+    def _update_turn(self, inp_event):
+        self.turn = int(inp_event.param(0))
+        position = self.log_count - 1
+        positions = self.turn_positions
+        while len(positions) <= self.turn:
+            positions.append(position)
+        positions[self.turn] = position
+
+    def _update_gen(self, inp_event):
+        self.gen = int(inp_event.param(0))
+
+    def _update_game_type(self, inp_event):
+        self.game_type = inp_event.param(0)
+
+    def _update_team_size(self, inp_event):
+        self.get_side(inp_event.param(0)).team_size = int(inp_event.param(1))
+
+    def _update_team_preview(self, inp_event):
+        self.get_side(inp_event.param(0)).add_preview(inp_event.param(1))
+
+    def _update_request(self, inp_event):
+        data = inp_event.json
+        if not data:
+            return
+        self.request = request.BattleRequest(data)
+        side = self.get_side(self.request.side_id)
+        for member in self.request.team:
+            pokemon = side.get(member.name, member.details)
+            pokemon.stats = member.stats
+            pokemon.item = member.item
+            pokemon.ability = member.ability
+            if member.condition:
+                pokemon.set_condition(member.condition)
+
+    def _update_inactive(self, inp_event):
+        timer = decision.parse_inactive(inp_event.rest())
+        if timer is None:
+            return
+        name, seconds = timer
+        if name is None or (self.client is not None and
+                            utils.name_to_id(name) == self.client.id):
+            self.timer_deadline = time.monotonic() + seconds
+
+    def _update_inactive_off(self, inp_event):
+        self.timer_deadline = None
+
+    #Maps input types to the methods used to update the battle state
+    _state_handlers = {
+        'switch': _update_switch,
+        'drag': _update_switch,
+        'replace': _update_switch,
+        'detailschange': _update_details,
+        '-formechange': _update_details,
+        '-damage': _update_condition,
+        '-heal': _update_condition,
+        '-sethp': _update_condition,
+        '-status': _update_status,
+        '-curestatus': _update_cure_status,
+        '-cureteam': _update_cure_team,
+        'faint': _update_faint,
+        '-boost': _update_boost,
+        '-unboost': _update_boost,
+        '-setboost': _update_set_boost,
+        '-clearboost': _update_clear_boost,
+        '-clearallboost': _update_clear_all_boost,
+        '-clearpositiveboost': _update_clear_signed_boost,
+        '-clearnegativeboost': _update_clear_signed_boost,
+        '-invertboost': _update_invert_boost,
+        '-copyboost': _update_copy_boost,
+        '-swapboost': _update_swap_boost,
+        '-start': _update_volatile,
+        '-end': _update_volatile,
+        '-item': _update_item,
+        '-enditem': _update_item,
+        '-ability': _update_ability,
+        'move': _update_move,
+        '-weather': _update_weather,
+        '-fieldstart': _update_field,
+        '-fieldend': _update_field,
+        '-sidestart': _update_side_condition,
+        '-sideend': _update_side_condition,
+        'turn': _update_turn,
+        'gen': _update_gen,
+        'gametype': _update_game_type,
+        'teamsize': _update_team_size,
+        'poke': _update_team_preview,
+        'request': _update_request,
+        'inactive': _update_inactive,
+        'inactiveoff': _update_inactive_off
+    }
 
     @utils.require_client
     async def save_replay(self, client=None, delay=0, lifespan=math.inf):
@@ -267,7 +717,55 @@ class Battle(Room):
             delay=delay, lifespan=lifespan)
 
     @utils.require_client
-    async def switch(self, switch_id, turn_num, client=None, 
+    async def choose(self, choice, rqid=None, client=None,
+        delay=0, lifespan=math.inf):
+        """
+        |coro|
+
+        Uses the specified client or the object's client attribute to send a
+        choice for the current request. The client must be one of the players
+        in the battle for this to work.
+
+        Args:
+            choice (:obj:`str`) : The choice to send. Ex: 'move 1',
+                'switch 3', 'move 2 terastallize'
+            rqid (:obj:`int`, optional) : The id of the request being answered.
+                Defaults to the id of the battle's latest request.
+        """
+        if rqid is None and self.request is not None:
+            rqid = self.request.rqid
+        if rqid is not None:
+            choice = '{}|{}'.format(choice, rqid)
+        await client.use_command(self.id, 'choose', choice,
+            delay=delay, lifespan=lifespan)
+
+    @utils.require_client
+    async def rechoose(self, choice, rqid=None, client=None,
+        delay=0, lifespan=math.inf):
+        """
+        |coro|
+
+        Uses the specified client or the object's client attribute to undo the
+        choice already sent for the current request and send a new one. Both
+        commands are sent in the same frame.
+        """
+        if rqid is None and self.request is not None:
+            rqid = self.request.rqid
+        if rqid is not None:
+            choice = '{}|{}'.format(choice, rqid)
+        await client.add_output(['{}|/undo'.format(self.id),
+            '{}|/choose {}'.format(self.id, choice)],
+            delay=delay, lifespan=lifespan)
+
+    def turn_choice(self, battle_request=None):
+        """
+        Returns a showdown.choice.TurnChoice used to choose for every active
+        slot at once and send the whole turn in a single frame.
+        """
+        return choice_module.TurnChoice(self, battle_request)
+
+    @utils.require_client
+    async def switch(self, switch_id, rqid=None, client=None,
         delay=0, lifespan=math.inf):
         """
         |coro|
@@ -276,22 +774,21 @@ class Battle(Room):
         different pokemon. The client must be one of the players in the battle 
         for this to work.
         """
-        await self.client.use_command(self.id, 'timer', 'on',
+        await self.choose('switch {}'.format(switch_id), rqid, client=client,
             delay=delay, lifespan=lifespan)
 
     @utils.require_client
-    async def move(self, move_id, turn_num, mega=False, client=None,
+    async def move(self, move_id, rqid=None, mega=False, client=None,
         delay=0, lifespan=math.inf):
         """
         |coro|
 
-        Uses the specified client or the object's client attribute to turn on
-        the battle timer. The client must be one of the players in the battle 
-        for this to work.
+        Uses the specified client or the object's client attribute to use a
+        move. The client must be one of the players in the battle for this to
+        work.
         """
-        await self.client.use_command(self.id, 'choose', 'move {}{}|{}'
-            .format(move_id, ' mega' if mega else '', turn_num),
-            delay=delay, lifespan=lifespan)
+        await self.choose('move {}{}'.format(move_id, ' mega' if mega else ''),
+            rqid, client=client, delay=delay, lifespan=lifespan)
 
     @utils.require_client
     async def undo(self, client=None, delay=0, lifespan=math.inf):
@@ -302,7 +799,7 @@ class Battle(Room):
         last move or switch. The player must be on of the players in the battle
         for this to work.
         """
-        await self.client.use_comand(self.id, 'undo',
+        await client.use_command(self.id, 'undo',
             delay=delay, lifespan=lifespan)
 
 class_map = {
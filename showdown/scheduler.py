@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Module for the OutputScheduler used by a client's output queue"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+class OutputScheduler:
+    """
+    Class used to schedule a client's outputs. Tokens are kept in a heap keyed
+    on their ignore_before time, and tokens with a finite lifespan are also
+    kept in a heap keyed on their discard_after time so that expired tokens
+    can be discarded in bulk. Entries of sent tokens are dropped from the
+    expiry heap once they make up half of it, so its size follows the
+    pending tokens rather than the discard window. Times are read from
+    time.monotonic.
+
+    Tokens are expected to have ignore_before, discard_after and discarded
+    attributes, as showdown.client.OutputToken objects do.
+
+    Attributes:
+        discarded (:obj:`int`) : The number of tokens that expired before
+            they were due.
+    """
+    def __init__(self):
+        self.discarded = 0
+        self._due = []
+        self._expiry = []
+        self._sent_expiring = 0
+        self._pending = 0
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return self._pending
+
+    def __repr__(self):
+        return '<{} pending={}>'.format(self.__class__.__name__, self._pending)
+
+    def qsize(self):
+        """
+        Returns the number of tokens waiting to be sent.
+        """
+        return self._pending
+
+    def empty(self):
+        """
+        Returns True if no tokens are waiting to be sent.
+        """
+        return not self._pending
+
+    def put_nowait(self, token):
+        """
+        Schedules token to be returned by get once its ignore_before time has
+        passed.
+        """
+        entry = [token.ignore_before, next(self._counter), token]
+        heapq.heappush(self._due, entry)
+        if token.discard_after != math.inf:
+            heapq.heappush(self._expiry, (token.discard_after, entry[1], entry))
+        self._pending += 1
+        self._wakeup.set()
+
+    async def put(self, token):
+        """
+        |coro|
+
+        Schedules token to be returned by get once its ignore_before time has
+        passed.
+        """
+        self.put_nowait(token)
+
+    def discard_expired(self, now=None):
+        """
+        Discards every pending token whose discard_after time has passed.
+
+        Returns:
+            int : The number of tokens discarded.
+        """
+        now = time.monotonic() if now is None else now
+        count = 0
+        expiry = self._expiry
+        while expiry and expiry[0][0] < now:
+            entry = heapq.heappop(expiry)[2]
+            token = entry[2]
+            if token is None:
+                self._sent_expiring -= 1
+                continue
+            entry[2] = None
+            token.discarded = True
+            logger.info('>>> Discarding {}'.format(token))
+            count += 1
+        self._pending -= count
+        self.discarded += count
+        return count
+
+    def _forget_expiry(self):
+        """
+        Counts a sent token's expiry entry, and rebuilds the expiry heap
+        without sent tokens once they make up half of it.
+        """
+        self._sent_expiring += 1
+        if self._sent_expiring * 2 >= len(self._expiry):
+            self._expiry = [item for item in self._expiry
+                            if item[2][2] is not None]
+            heapq.heapify(self._expiry)
+            self._sent_expiring = 0
+
+    def get_nowait(self, now=None):
+        """
+        Returns the next due token, or None if no token is due.
+        """
+        now = time.monotonic() if now is None else now
+        self.discard_expired(now)
+        due = self._due
+        while due:
+            entry = due[0]
+            if entry[2] is None:
+                heapq.heappop(due)
+            elif entry[0] <= now:
+                heapq.heappop(due)
+                token, entry[2] = entry[2], None
+                self._pending -= 1
+                if token.discard_after != math.inf:
+                    self._forget_expiry()
+                return token
+            else:
+                break
+        return None
+
+    def peek_nowait(self, now=None):
+        """
+        Returns the next due token without removing it, or None if no token
+        is due.
+        """
+        now = time.monotonic() if now is None else now
+        self.discard_expired(now)
+        due = self._due
+        while due and due[0][2] is None:
+            heapq.heappop(due)
+        if due and due[0][0] <= now:
+            return due[0][2]
+        return None
+
+    def next_due(self):
+        """
+        Returns the monotonic time at which the next token is due, or None if
+        there are no pending tokens.
+        """
+        due = self._due
+        while due and due[0][2] is None:
+            heapq.heappop(due)
+        return due[0][0] if due else None
+
+    async def get(self):
+        """
+        |coro|
+
+        Waits for the next token to become due and returns it. Sleeps until
+        the earliest ignore_before time, or until a new token is scheduled.
+        """
+        while True:
+            now = time.monotonic()
+            token = self.get_nowait(now)
+            if token is not None:
+                return token
+            next_due = self.next_due()
+            self._wakeup.clear()
+            timeout = None if next_due is None else max(0, next_due - now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
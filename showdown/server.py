@@ -5,8 +5,7 @@ import string
 import requests
 import traceback
 import logging
-import json
-from . import utils
+from . import utils, jsonlib
 from functools import wraps
 
 #Logging setup
@@ -43,6 +42,27 @@ def get_host(server_id):
         raise ValueError('Malformed server_info data at `{}`.'
             .format(info_url))
 
+async def get_host_async(server_id, session):
+    """
+    |coro|
+
+    Requests a server's host name from showdown using the aiohttp session
+    specified by session. Use get_host to do so synchronously.
+    """
+    info_url = SERVER_INFO_URL_BASE.format(server_id=server_id)
+    logger.info('Requesting server host from {}'.format(info_url))
+    async with session.get(info_url) as response:
+        if response.status != 200:
+            raise ValueError('Info for server `{}` is unavailable.'
+                .format(server_id))
+        try:
+            data = jsonlib.loads(await response.text())
+            return '{}:{}'.format(data['host'], data['port'])
+        except:
+            traceback.print_exc()
+            raise ValueError('Malformed server_info data at `{}`.'
+                .format(info_url))
+
 def _generate_ws_triplet():
     """
     Generates a zero-filled string of a random three digit base ten number.
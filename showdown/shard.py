@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""Module for the ShardedRunner class"""
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import zlib
+from . import client, pool
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+def shard_for(key, num_shards):
+    """
+    Returns the index of the shard responsible for key. The result is stable
+    across processes and runs.
+
+    Examples:
+        >>> shard_for('battle-gen9ou-123', 4)
+        3
+    """
+    return zlib.crc32(key.encode('utf-8')) % num_shards
+
+def merge_metrics(total, metrics):
+    """
+    Adds the numeric values of metrics into total, recursing into nested
+    dicts. Returns total.
+
+    Examples:
+        >>> merge_metrics({'rooms': 1, 'tasks': {'live': 2}},
+        ...               {'rooms': 3, 'tasks': {'live': 1}})
+        {'rooms': 4, 'tasks': {'live': 3}}
+    """
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            merge_metrics(total.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+    return total
+
+class _Shard:
+    """
+    Bookkeeping for one worker process of a ShardedRunner.
+    """
+    def __init__(self, index, accounts):
+        self.index = index
+        self.accounts = accounts
+        self.rooms = set()
+        self.process = None
+        self.conn = None
+        self.metrics = {}
+        self.restarts = 0
+        self.started = 0
+        self.restart_at = None
+
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def send(self, *message):
+        if self.conn is not None:
+            try:
+                self.conn.send(message)
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+
+def _shard_main(index, accounts, rooms, conn, client_class, pool_kwargs,
+                metrics_interval):
+    """
+    Entry point of a shard's worker process. Exits with a nonzero code if
+    every client in the shard disconnected, so the coordinator restarts it.
+    """
+    crashed = False
+    try:
+        crashed = asyncio.run(_shard_worker(index, accounts, rooms, conn,
+            client_class, pool_kwargs, metrics_interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+    if crashed:
+        sys.exit(1)
+
+async def _shard_worker(index, accounts, rooms, conn, client_class,
+                        pool_kwargs, metrics_interval):
+    """
+    Runs a ClientPool for the shard's accounts and serves commands sent by the
+    coordinator until it asks the shard to stop.
+
+    Returns:
+        bool : True if the shard stopped because its clients disconnected.
+    """
+    loop = asyncio.get_event_loop()
+    commands = asyncio.Queue()
+
+    def on_readable():
+        try:
+            while conn.poll():
+                commands.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+            commands.put_nowait(('stop',))
+
+    #The client that joined each room. The pool's client list changes as
+    #clients connect and disconnect, so leaves have to use this record
+    #rather than hashing again.
+    owners = {}
+    watched = set()
+    joining = {}
+
+    def connected(owner):
+        #Clients compare equal by user id, so check identity instead
+        return any(pool_client is owner for pool_client in client_pool.clients)
+
+    def watch_deinit(owner):
+        async def forget_room(inp_event):
+            if owners.get(inp_event.room_id) is owner:
+                del owners[inp_event.room_id]
+        owner.add_handler('deinit', forget_room)
+        watched.add(id(owner))
+
+    async def room_client(room_id):
+        owner = owners.get(room_id)
+        if owner is not None and connected(owner):
+            return owner
+        while not client_pool.clients:
+            await asyncio.sleep(.1)
+        clients = client_pool.clients
+        chosen = clients[shard_for(room_id, len(clients))]
+        await chosen.ready.wait()
+        return chosen
+
+    def start_join(room_id):
+        joining[room_id] = asyncio.ensure_future(join(room_id))
+
+    async def join(room_id):
+        try:
+            owner = await room_client(room_id)
+            if id(owner) not in watched:
+                watch_deinit(owner)
+            owners[room_id] = owner
+            await owner.join(room_id)
+        finally:
+            if joining.get(room_id) is asyncio.current_task():
+                del joining[room_id]
+
+    async def leave(room_id):
+        #Let a join still waiting for its client record the owner first
+        pending = joining.pop(room_id, None)
+        if pending is not None:
+            await asyncio.wait([pending])
+        owner = owners.pop(room_id, None)
+        if owner is not None and connected(owner):
+            await owner.leave(room_id)
+
+    async def report_metrics():
+        while True:
+            conn.send(('metrics', index, client_pool.metrics()))
+            await asyncio.sleep(metrics_interval)
+
+    async def serve_commands():
+        while True:
+            command, *args = await commands.get()
+            if command == 'stop':
+                return
+            elif command == 'join':
+                start_join(*args)
+            elif command == 'leave':
+                asyncio.ensure_future(leave(*args))
+
+    loop.add_reader(conn.fileno(), on_readable)
+    async with pool.ClientPool(accounts, client_class, **pool_kwargs) \
+            as client_pool:
+        for room_id in rooms:
+            start_join(room_id)
+        reporter = asyncio.ensure_future(report_metrics())
+        serving = asyncio.ensure_future(serve_commands())
+        running = asyncio.ensure_future(client_pool.wait())
+        try:
+            done, pending = await asyncio.wait([serving, running],
+                return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (reporter, serving, running):
+                task.cancel()
+            loop.remove_reader(conn.fileno())
+        return serving not in done
+
+class ShardedRunner:
+    """
+    Class used to spread clients over several worker processes, each running
+    a showdown.pool.ClientPool on its own event loop. Accounts are assigned to
+    shards round robin and rooms are assigned by hashing their ids. The
+    coordinator talks to workers over local pipes, restarts workers that
+    crash, and combines the metrics they report.
+
+    Notes:
+        client_class and pool_kwargs are sent to worker processes, so they
+        need to be picklable. Define client classes at the top level of an
+        importable module.
+
+    Args:
+        accounts (:obj:`list`) : A list of (name, password) tuples for the
+            accounts to run.
+        client_class (:obj:`type`, optional) : The Client subclass used for
+            every account. Defaults to showdown.client.Client.
+        num_shards (:obj:`int`, optional) : The number of worker processes.
+            Defaults to the number of accounts or the number of cores,
+            whichever is lower.
+        restart_delay (:obj:`float`, optional) : The number of seconds to wait
+            before restarting a crashed worker. Doubles on each crash that
+            happens shortly after a restart, up to 60 seconds. Defaults to 1.
+        metrics_interval (:obj:`float`, optional) : The number of seconds
+            between metric reports from each worker. Defaults to 5.
+        start_method (:obj:`str`, optional) : The multiprocessing start method
+            used for workers. Defaults to 'spawn'.
+        **pool_kwargs : Keyword arguments passed to each worker's ClientPool,
+            and through it to every client.
+            Ex: server_id='showdown', autologin=False, max_room_logs=1000
+
+    Example:
+        if __name__ == '__main__':
+            runner = ShardedRunner(accounts, SpectatorClient, autologin=False)
+            runner.start()
+            for battle_id in battle_ids:
+                runner.assign_room(battle_id)
+            runner.run()
+    """
+    def __init__(self, accounts, client_class=client.Client, *,
+                 num_shards=None, restart_delay=1.0, metrics_interval=5.0,
+                 start_method='spawn', **pool_kwargs):
+        accounts = list(accounts)
+        if not accounts:
+            raise ValueError('ShardedRunner needs at least one account')
+        num_shards = num_shards or min(len(accounts), os.cpu_count() or 1)
+        self.client_class = client_class
+        self.pool_kwargs = pool_kwargs
+        self.restart_delay = restart_delay
+        self.metrics_interval = metrics_interval
+        self.shards = [_Shard(i, accounts[i::num_shards])
+                       for i in range(num_shards)]
+        self.running = False
+        self._context = multiprocessing.get_context(start_method)
+
+    def __repr__(self):
+        return '<{} shards={} alive={}>'.format(self.__class__.__name__,
+            len(self.shards), sum(shard.alive() for shard in self.shards))
+
+    def shard_for(self, room_id):
+        """
+        Returns the index of the shard responsible for room_id.
+        """
+        return shard_for(room_id, len(self.shards))
+
+    def assign_room(self, room_id):
+        """
+        Assigns the room specified by room_id to a shard, and has one of that
+        shard's clients join it. The room is rejoined if the shard restarts.
+
+        Returns:
+            int : The index of the shard the room was assigned to.
+        """
+        shard = self.shards[self.shard_for(room_id)]
+        if room_id not in shard.rooms:
+            shard.rooms.add(room_id)
+            shard.send('join', room_id)
+        return shard.index
+
+    def unassign_room(self, room_id):
+        """
+        Removes the room specified by room_id from its shard, and has the
+        shard's client leave it.
+        """
+        shard = self.shards[self.shard_for(room_id)]
+        if room_id in shard.rooms:
+            shard.rooms.discard(room_id)
+            shard.send('leave', room_id)
+
+    def _spawn(self, shard):
+        parent_conn, child_conn = self._context.Pipe()
+        shard.process = self._context.Process(
+            target=_shard_main,
+            args=(shard.index, shard.accounts, sorted(shard.rooms),
+                  child_conn, self.client_class, self.pool_kwargs,
+                  self.metrics_interval),
+            name='showdown-shard-{}'.format(shard.index),
+            daemon=True)
+        shard.process.start()
+        child_conn.close()
+        shard.conn = parent_conn
+        shard.started = time.monotonic()
+        shard.restart_at = None
+        logger.info('Started shard {} (pid {})'.format(
+            shard.index, shard.process.pid))
+
+    def start(self):
+        """
+        Starts every worker process.
+        """
+        self.running = True
+        for shard in self.shards:
+            if not shard.alive():
+                self._spawn(shard)
+
+    def poll(self, timeout=1.0):
+        """
+        Handles messages from workers and restarts crashed workers. Waits up
+        to timeout seconds for something to happen.
+        """
+        waitables = {}
+        now = time.monotonic()
+        for shard in self.shards:
+            if shard.conn is not None:
+                waitables[shard.conn] = shard
+            if shard.restart_at is not None:
+                timeout = max(0, min(timeout, shard.restart_at - now))
+            elif shard.process is not None:
+                waitables[shard.process.sentinel] = shard
+        ready = multiprocessing.connection.wait(list(waitables),
+            timeout=timeout)
+        for waitable in ready:
+            shard = waitables[waitable]
+            if waitable is shard.conn:
+                try:
+                    while shard.conn.poll():
+                        self._handle_message(shard, shard.conn.recv())
+                except (EOFError, OSError):
+                    shard.conn.close()
+                    shard.conn = None
+        now = time.monotonic()
+        for shard in self.shards:
+            if shard.process is None or shard.alive() or not self.running:
+                continue
+            if shard.restart_at is None:
+                self._on_crash(shard, now)
+            elif now >= shard.restart_at:
+                shard.restarts += 1
+                self._spawn(shard)
+
+    def _on_crash(self, shard, now):
+        logger.warning('Shard {} exited with code {}'.format(
+            shard.index, shard.process.exitcode))
+        if shard.conn is not None:
+            shard.conn.close()
+            shard.conn = None
+        shard.metrics = {}
+        uptime = now - shard.started
+        delay = self.restart_delay
+        if uptime < 60:
+            delay = min(60, self.restart_delay * 2 ** shard.restarts)
+        shard.restart_at = now + delay
+
+    def _handle_message(self, shard, message):
+        kind, *args = message
+        if kind == 'metrics':
+            shard.metrics = args[1]
+
+    def run(self):
+        """
+        Starts the workers if needed, and coordinates them until stop is called
+        or the process is interrupted.
+        """
+        if not self.running:
+            self.start()
+        try:
+            while self.running:
+                self.poll()
+        except KeyboardInterrupt:
+            logger.info('Interrupt signal received. Stopping shards.')
+        finally:
+            self.stop()
+
+    def stop(self, timeout=5.0):
+        """
+        Asks every worker to stop, and terminates the ones that don't exit
+        within timeout seconds.
+        """
+        self.running = False
+        for shard in self.shards:
+            shard.send('stop')
+        deadline = time.monotonic() + timeout
+        for shard in self.shards:
+            if shard.process is None:
+                continue
+            shard.process.join(max(0, deadline - time.monotonic()))
+            if shard.process.is_alive():
+                shard.process.terminate()
+                shard.process.join()
+            if shard.conn is not None:
+                shard.conn.close()
+                shard.conn = None
+
+    def metrics(self):
+        """
+        Returns a dict combining the latest metrics reported by every shard.
+        The 'total' entry sums each numeric metric over every client.
+        """
+        total = {}
+        shards = {}
+        for shard in self.shards:
+            for client_metrics in shard.metrics.values():
+                merge_metrics(total, client_metrics)
+            shards[shard.index] = {
+                'alive': shard.alive(),
+                'restarts': shard.restarts,
+                'rooms': len(shard.rooms),
+                'clients': shard.metrics
+            }
+        return {
+            'total': total,
+            'shards': shards,
+            'restarts': sum(shard.restarts for shard in self.shards)
+        }
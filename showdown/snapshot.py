@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""Module for the array backed BattleSnapshot class"""
+from array import array
+from . import state, utils
+
+#Layout of the values stored for each pokemon
+POKEMON_FIELDS = ('species', 'hp', 'max_hp', 'status', 'level', 'active',
+                  'atk', 'def', 'spa', 'spd', 'spe') + \
+                 tuple('boost_' + stat for stat in state.BOOSTS) + \
+                 ('item', 'ability', 'move1', 'move2', 'move3', 'move4')
+POKEMON_SIZE = len(POKEMON_FIELDS)
+
+#Side conditions stored as layer counts on each side
+SIDE_CONDITIONS = ('stealthrock', 'spikes', 'toxicspikes', 'stickyweb',
+                   'reflect', 'lightscreen', 'auroraveil', 'tailwind',
+                   'safeguard', 'mist')
+SIDE_FIELDS = SIDE_CONDITIONS + ('team_size',)
+
+HEADER_FIELDS = ('turn', 'weather', 'terrain', 'trickroom', 'gravity')
+
+SIDES = ('p1', 'p2')
+TEAM_SIZE = 6
+SIDE_SIZE = len(SIDE_FIELDS) + TEAM_SIZE * POKEMON_SIZE
+SIZE = len(HEADER_FIELDS) + len(SIDES) * SIDE_SIZE
+
+STATUSES = ('', 'brn', 'par', 'slp', 'frz', 'psn', 'tox', 'fnt')
+STATUS_CODES = {status: i for i, status in enumerate(STATUSES)}
+
+POKEMON_INDEX = {field: i for i, field in enumerate(POKEMON_FIELDS)}
+SIDE_INDEX = {field: i for i, field in enumerate(SIDE_FIELDS)}
+HEADER_INDEX = {field: i for i, field in enumerate(HEADER_FIELDS)}
+
+class Interner:
+    """
+    Class mapping names to small integer ids and back. Id 0 is reserved for
+    the empty string, so unknown values are stored as 0.
+
+    Args:
+        names (:obj:`list`, optional) : The names to start with, in id order.
+
+    Attributes:
+        names (:obj:`list`) : Every interned name, indexed by id.
+        ids (:obj:`dict`) : Dictionary with entries of {name : id}.
+
+    Examples:
+        >>> interner = Interner()
+        >>> interner.intern('Thunderbolt')
+        1
+        >>> interner.name(1)
+        'thunderbolt'
+    """
+    __slots__ = ('names', 'ids')
+
+    def __init__(self, names=('',)):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __reduce__(self):
+        return (self.__class__, (self.names,))
+
+    def intern(self, name):
+        """
+        Returns the id of name, assigning it a new id if needed. Names are
+        converted to ids with showdown.utils.name_to_id first.
+        """
+        name = utils.name_to_id(name) if name else ''
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def name(self, name_id):
+        """
+        Returns the name interned as name_id.
+        """
+        return self.names[name_id]
+
+class BattleSnapshot:
+    """
+    Class representing the state of a battle as one flat array of integers,
+    for search based decision engines. Species, moves, items and abilities
+    are stored as ids from an Interner shared by every copy of a snapshot, so
+    copying a snapshot only copies the array.
+
+    Notes:
+        Stats are 0 unless they're known, since the protocol only reveals the
+        stats of a player's own pokemon.
+
+    Args:
+        data (:obj:`array.array`, optional) : The snapshot's values. Defaults
+            to an array of zeros.
+        interner (showdown.snapshot.Interner, optional) : The interner used
+            for the snapshot's names. Defaults to a new Interner.
+
+    Attributes:
+        data (:obj:`array.array`) : The snapshot's values, laid out as the
+            header fields followed by each side's fields and pokemon.
+        interner (showdown.snapshot.Interner) : The interner used for the
+            snapshot's names.
+
+    Examples:
+        >>> snapshot = BattleSnapshot()
+        >>> snapshot.set('p1', 0, 'hp', 42)
+        >>> clone = snapshot.copy()
+        >>> clone.set('p1', 0, 'hp', 0)
+        >>> snapshot.get('p1', 0, 'hp'), clone.get('p1', 0, 'hp')
+        (42, 0)
+    """
+    __slots__ = ('data', 'interner')
+
+    def __init__(self, data=None, interner=None):
+        self.data = data if data is not None else array('i', [0]) * SIZE
+        self.interner = interner if interner is not None else Interner()
+
+    def __repr__(self):
+        return '<{} turn={}>'.format(self.__class__.__name__, self.turn)
+
+    def __reduce__(self):
+        return (self.__class__, (self.data, self.interner))
+
+    def copy(self):
+        """
+        Returns a copy of the snapshot that shares its interner.
+        """
+        return BattleSnapshot(self.data[:], self.interner)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    @classmethod
+    def from_battle(cls, battle, interner=None):
+        """
+        Builds a snapshot of the current state of battle.
+
+        Args:
+            battle (showdown.room.Battle) : The battle to take a snapshot of.
+            interner (showdown.snapshot.Interner, optional) : The interner to
+                use. Reuse one interner for every snapshot of a battle to keep
+                ids stable. Defaults to a new Interner.
+        """
+        snapshot = cls(interner=interner)
+        data, intern = snapshot.data, snapshot.interner.intern
+        data[HEADER_INDEX['turn']] = battle.turn
+        data[HEADER_INDEX['weather']] = intern(battle.weather)
+        for field in battle.fields:
+            field_id = utils.name_to_id(field)
+            if field_id.endswith('terrain'):
+                data[HEADER_INDEX['terrain']] = intern(field_id)
+            elif field_id in HEADER_INDEX:
+                data[HEADER_INDEX[field_id]] = 1
+        for side_id in SIDES:
+            side = battle.sides.get(side_id)
+            if side is None:
+                continue
+            offset = side_offset(side_id)
+            for condition, layers in side.conditions.items():
+                index = SIDE_INDEX.get(utils.name_to_id(condition))
+                if index is not None:
+                    data[offset + index] = layers
+            data[offset + SIDE_INDEX['team_size']] = side.team_size or 0
+            active_slots = {id(pokemon): slot + 1
+                            for slot, pokemon in enumerate(side.active)
+                            if pokemon is not None}
+            team = list(side.pokemon.values())[:TEAM_SIZE]
+            for i, pokemon in enumerate(team):
+                start = pokemon_offset(side_id, i)
+                values = [intern(pokemon.species), pokemon.hp, pokemon.max_hp,
+                          STATUS_CODES.get(pokemon.status, 0), pokemon.level,
+                          active_slots.get(id(pokemon), 0)]
+                values.extend(pokemon.stats or (0,) * 5)
+                values.extend(pokemon.boosts)
+                values.append(intern(pokemon.item))
+                values.append(intern(pokemon.ability))
+                moves = [intern(move) for move in pokemon.moves[:4]]
+                values.extend(moves + [0] * (4 - len(moves)))
+                data[start:start + POKEMON_SIZE] = array('i', values)
+        return snapshot
+
+    @property
+    def turn(self):
+        return self.data[HEADER_INDEX['turn']]
+
+    def get(self, side_id, index, field):
+        """
+        Returns the value of field for the pokemon at index on side_id.
+        """
+        return self.data[pokemon_offset(side_id, index) + POKEMON_INDEX[field]]
+
+    def set(self, side_id, index, field, value):
+        """
+        Sets the value of field for the pokemon at index on side_id.
+        """
+        self.data[pokemon_offset(side_id, index) + POKEMON_INDEX[field]] = value
+
+    def get_side(self, side_id, field):
+        """
+        Returns the value of a side field, such as a side condition's layers.
+        """
+        return self.data[side_offset(side_id) + SIDE_INDEX[field]]
+
+    def set_side(self, side_id, field, value):
+        """
+        Sets the value of a side field.
+        """
+        self.data[side_offset(side_id) + SIDE_INDEX[field]] = value
+
+    def pokemon(self, side_id, index):
+        """
+        Returns a dict of every field for the pokemon at index on side_id, with
+        interned ids converted back to names. Meant for debugging.
+        """
+        start = pokemon_offset(side_id, index)
+        values = dict(zip(POKEMON_FIELDS, self.data[start:start + POKEMON_SIZE]))
+        name = self.interner.name
+        for field in ('species', 'item', 'ability',
+                      'move1', 'move2', 'move3', 'move4'):
+            values[field] = name(values[field])
+        values['status'] = STATUSES[values['status']]
+        return values
+
+def side_offset(side_id):
+    """
+    Returns the position of side_id's first field in a snapshot's data.
+    """
+    return len(HEADER_FIELDS) + SIDES.index(side_id) * SIDE_SIZE
+
+def pokemon_offset(side_id, index):
+    """
+    Returns the position of the first field of the pokemon at index on
+    side_id in a snapshot's data.
+    """
+    return side_offset(side_id) + len(SIDE_FIELDS) + index * POKEMON_SIZE
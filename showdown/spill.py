@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Module for storing room logs in memory mapped segment files, so rooms can
+keep long histories without holding them in memory.
+"""
+import logging
+import mmap
+import os
+import re
+from array import array
+from . import event, logstore
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+SEGMENT_NAME = 'segment-{:06d}.log'
+SEGMENT_RE = re.compile(r'^segment-(\d+)\.log$')
+
+class SegmentStore:
+    """
+    Class representing a directory of append-only segment files shared by
+    the rooms of a client. Data is appended to the newest segment, which is
+    rotated once it reaches segment_size, and read back through memory maps
+    without loading the files.
+
+    Notes:
+        Numbering continues after any segments already in the directory, and
+        existing segments are left untouched.
+
+    Args:
+        directory (:obj:`str`) : The directory the segments are written to. It
+            is created if needed.
+        segment_size (:obj:`int`, optional) : The size in bytes at which a
+            segment is rotated. Defaults to 64 MiB.
+        max_segments (:obj:`int` or None, optional) : The number of segments
+            kept. Older segments are deleted on rotation, and the lines they
+            held are dropped from every room. Defaults to None, which keeps
+            every segment.
+
+    Attributes:
+        first_segment (:obj:`int`) : The number of the oldest readable
+            segment.
+        current (:obj:`int`) : The number of the segment being written to.
+    """
+    def __init__(self, directory, segment_size=64 * 2 ** 20,
+                 max_segments=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        existing = [int(match.group(1)) for match in
+                    map(SEGMENT_RE.match, os.listdir(directory)) if match]
+        self.current = max(existing, default=-1)
+        self.first_segment = self.current + 1
+        self._file = None
+        self._size = 0
+        self._flushed = 0
+        self._maps = {}
+
+    def __repr__(self):
+        return '<{} `{}` segments {}-{}>'.format(self.__class__.__name__,
+            self.directory, self.first_segment, self.current)
+
+    def path(self, segment):
+        """
+        Returns the path of the segment file numbered segment.
+        """
+        return os.path.join(self.directory, SEGMENT_NAME.format(segment))
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self.current += 1
+        self._file = open(self.path(self.current), 'wb')
+        self._size = self._flushed = 0
+        logger.debug('Rotated to {}'.format(self.path(self.current)))
+        if self.max_segments is not None:
+            while self.current - self.first_segment >= self.max_segments:
+                self._delete(self.first_segment)
+                self.first_segment += 1
+
+    def _delete(self, segment):
+        segment_map = self._maps.pop(segment, None)
+        if segment_map is not None:
+            segment_map.close()
+        try:
+            os.remove(self.path(segment))
+        except FileNotFoundError:
+            pass
+
+    def append(self, data):
+        """
+        Appends data to the newest segment, rotating it first if data doesn't
+        fit.
+
+        Returns:
+            tuple : The (segment, offset) data was written at.
+        """
+        if self._file is None or \
+                (self._size and self._size + len(data) > self.segment_size):
+            self._rotate()
+        offset = self._size
+        self._file.write(data)
+        self._size += len(data)
+        return self.current, offset
+
+    def read(self, segment, offset, length):
+        """
+        Returns length bytes read from segment at offset, or None if the
+        segment has been deleted.
+        """
+        if segment < self.first_segment or segment > self.current:
+            return None
+        end = offset + length
+        if segment == self.current and end > self._flushed:
+            self._file.flush()
+            self._flushed = self._size
+        segment_map = self._maps.get(segment)
+        if segment_map is None or len(segment_map) < end:
+            if segment_map is not None:
+                segment_map.close()
+            if not end:
+                return b''
+            with open(self.path(segment), 'rb') as segment_file:
+                segment_map = mmap.mmap(segment_file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+            self._maps[segment] = segment_map
+        return segment_map[offset:end]
+
+    def close(self):
+        """
+        Closes the newest segment and every memory map.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for segment_map in self._maps.values():
+            segment_map.close()
+        self._maps.clear()
+
+class SpillLogStore:
+    """
+    Class used in place of a showdown.logstore.LogStore to keep a room's
+    full history in a SegmentStore. Every line is appended to the segments
+    as it arrives, and only the most recent lines are also kept in memory.
+    Older lines are read back from the segments' memory maps when needed.
+
+    Args:
+        recent (:obj:`int`) : The number of recent lines kept in memory.
+        room_id (:obj:`str`) : The id of the room.
+        segments (:obj:`showdown.spill.SegmentStore`) : The segment store the
+            lines are written to.
+        maxlen (:obj:`int` or None, optional) : The maximum number of lines
+            kept in total. Defaults to None, which keeps every line still in
+            the segments.
+
+    Attributes:
+        recent (:obj:`showdown.logstore.LogStore`) : The store holding the
+            lines kept in memory. A LogBudget only limits these lines, since
+            older lines can always be read back from the segments.
+    """
+    __slots__ = ('room_id', 'segments', 'maxlen', 'recent', '_segment_ids',
+                 '_offsets', '_lengths', '_first')
+
+    def __init__(self, recent, room_id, segments, maxlen=None):
+        self.room_id = room_id
+        self.segments = segments
+        self.maxlen = maxlen
+        self.recent = logstore.LogStore(recent, room_id)
+        self.clear()
+
+    def __len__(self):
+        self._trim()
+        return len(self._offsets) - self._first
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        return '<{} `{}` {} lines, {} in memory>'.format(
+            self.__class__.__name__, self.room_id, len(self),
+            len(self.recent))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield event.Event(self.line(i), self.room_id)
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield event.Event(self.line(i), self.room_id)
+
+    def __getitem__(self, index):
+        size = len(self)
+        if isinstance(index, slice):
+            return [event.Event(self.line(i), self.room_id)
+                    for i in range(*index.indices(size))]
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('SpillLogStore index out of range')
+        return event.Event(self.line(index), self.room_id)
+
+    def clear(self):
+        """
+        Removes every line from the room. Lines already written stay in the
+        segment files.
+        """
+        self.recent.clear()
+        self._segment_ids = array('I')
+        self._offsets = array('Q')
+        self._lengths = array('I')
+        self._first = 0
+
+    def nbytes(self):
+        """
+        Returns the number of bytes of memory used for the recent lines and
+        the index.
+        """
+        return self.recent.nbytes() + sum(len(index) * index.itemsize
+            for index in (self._segment_ids, self._offsets, self._lengths))
+
+    def _trim(self):
+        """
+        Drops index entries for lines in deleted segments or past maxlen.
+        """
+        first, total = self._first, len(self._offsets)
+        if self.maxlen is not None:
+            first = max(first, total - self.maxlen)
+        first_segment = self.segments.first_segment
+        while first < total and self._segment_ids[first] < first_segment:
+            first += 1
+        self._first = first
+        #Compact the index once most of it is unused
+        if first > 1024 and first * 2 > total:
+            for name in ('_segment_ids', '_offsets', '_lengths'):
+                setattr(self, name, getattr(self, name)[first:])
+            self._first = 0
+
+    def line(self, index):
+        """
+        Returns the line at index as a plain string.
+        """
+        size = len(self)
+        in_memory = len(self.recent)
+        if index >= size - in_memory:
+            return self.recent.line(index - (size - in_memory))
+        position = self._first + index
+        data = self.segments.read(self._segment_ids[position],
+            self._offsets[position], self._lengths[position])
+        return '' if data is None else data.decode('utf-8')
+
+    def lines(self):
+        """
+        Yields every line as a plain string, oldest first.
+        """
+        for i in range(len(self)):
+            yield self.line(i)
+
+    def window(self, start, stop):
+        """
+        Returns a list of the Events from index start up to index stop.
+        """
+        return [event.Event(self.line(i), self.room_id)
+                for i in range(max(0, start), min(stop, len(self)))]
+
+    def append(self, line):
+        """
+        Writes a line to the segments and keeps it in memory until newer
+        lines push it out.
+        """
+        data = str(line).encode('utf-8')
+        segment, offset = self.segments.append(data + b'\n')
+        self._segment_ids.append(segment)
+        self._offsets.append(offset)
+        self._lengths.append(len(data))
+        self.recent.append(line)
+        self._trim()
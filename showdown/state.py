@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""Module for the Pokemon and Side objects used to track battle state"""
+from . import utils
+
+#Order in which boosts are stored in Pokemon.boosts
+BOOSTS = ('atk', 'def', 'spa', 'spd', 'spe', 'accuracy', 'evasion')
+BOOST_INDEX = {stat: i for i, stat in enumerate(BOOSTS)}
+MAX_BOOST = 6
+
+def parse_ident(ident):
+    """
+    Splits a pokemon identifier into its side, slot and name.
+
+    Examples:
+        >>> parse_ident('p1a: Pikachu')
+        ('p1', 'a', 'Pikachu')
+        >>> parse_ident('p2: Mr. Mime')
+        ('p2', '', 'Mr. Mime')
+    """
+    position, _, name = ident.partition(': ')
+    return position[:2], position[2:], name
+
+def slot_index(slot):
+    """
+    Converts a slot letter into an index.
+
+    Examples:
+        >>> slot_index('b')
+        1
+    """
+    return ord(slot) - ord('a') if slot else 0
+
+def parse_details(details):
+    """
+    Splits a pokemon's details into its species, level, gender and shininess.
+
+    Examples:
+        >>> parse_details('Pikachu, L50, F, shiny')
+        ('Pikachu', 50, 'F', True)
+        >>> parse_details('Mewtwo')
+        ('Mewtwo', 100, '', False)
+    """
+    species, *rest = details.split(', ')
+    level, gender, shiny = 100, '', False
+    for token in rest:
+        if token[:1] == 'L' and token[1:].isdigit():
+            level = int(token[1:])
+        elif token == 'M' or token == 'F':
+            gender = token
+        elif token == 'shiny':
+            shiny = True
+    return species, level, gender, shiny
+
+def parse_condition(condition):
+    """
+    Splits a pokemon's condition into its hp, max hp and status. The max hp
+    is None when the condition doesn't include it.
+
+    Examples:
+        >>> parse_condition('45/100 par')
+        (45, 100, 'par')
+        >>> parse_condition('0 fnt')
+        (0, None, 'fnt')
+    """
+    hp, _, status = condition.partition(' ')
+    hp, _, max_hp = hp.partition('/')
+    return (int(hp) if hp.isdigit() else 0,
+            int(max_hp) if max_hp.isdigit() else None,
+            status)
+
+def effect_name(effect):
+    """
+    Strips the kind prefix off of an effect.
+
+    Examples:
+        >>> effect_name('move: Stealth Rock')
+        'Stealth Rock'
+        >>> effect_name('Reflect')
+        'Reflect'
+    """
+    kind, sep, name = effect.partition(': ')
+    return name if sep else kind
+
+class Pokemon:
+    """
+    Class representing what is known about a pokemon in a battle.
+
+    Args:
+        name (:obj:`str`) : The pokemon's nickname. Ex: 'Sparky'
+        details (:obj:`str`, optional) : The pokemon's details.
+            Ex: 'Pikachu, L50, F'
+
+    Attributes:
+        name (:obj:`str`) : The pokemon's nickname.
+        species (:obj:`str`) : The pokemon's species. Ex: 'Pikachu'
+        level (:obj:`int`) : The pokemon's level.
+        gender (:obj:`str`) : 'M', 'F' or the empty string.
+        shiny (:obj:`bool`) : True if the pokemon is shiny.
+        hp (:obj:`int`) : The pokemon's current hp. Out of 100 unless the
+            exact hp is known.
+        max_hp (:obj:`int`) : The pokemon's max hp.
+        stats (:obj:`list` or None) : The pokemon's atk, def, spa, spd and spe
+            stats, if known.
+        status (:obj:`str`) : The pokemon's status. Ex: 'par', 'fnt', ''
+        boosts (:obj:`list`) : The pokemon's stat boosts, in the order given
+            by showdown.state.BOOSTS.
+        active (:obj:`bool`) : True if the pokemon is on the field.
+        item (:obj:`str`) : The pokemon's item, if known.
+        ability (:obj:`str`) : The pokemon's ability, if known.
+        moves (:obj:`list`) : The ids of the moves the pokemon has used.
+        volatiles (:obj:`set`) : The ids of the pokemon's volatile effects.
+            Ex: {'confusion', 'substitute'}
+    """
+    __slots__ = ('name', 'species', 'level', 'gender', 'shiny', 'hp',
+                 'max_hp', 'stats', 'status', 'boosts', 'active', 'item',
+                 'ability', 'moves', 'volatiles')
+
+    def __init__(self, name, details=''):
+        self.name = name
+        self.species = name
+        self.level, self.gender, self.shiny = 100, '', False
+        self.hp, self.max_hp = 100, 100
+        self.stats = None
+        self.status = ''
+        self.boosts = [0] * len(BOOSTS)
+        self.active = False
+        self.item = ''
+        self.ability = ''
+        self.moves = []
+        self.volatiles = set()
+        if details:
+            self.set_details(details)
+
+    def __repr__(self):
+        return '<{} `{}` {}/{}{}>'.format(self.__class__.__name__,
+            self.species, self.hp, self.max_hp,
+            ' ' + self.status if self.status else '')
+
+    @property
+    def fainted(self):
+        return self.status == 'fnt'
+
+    def set_details(self, details):
+        """
+        Sets the pokemon's species, level, gender and shininess from details.
+        """
+        self.species, self.level, self.gender, self.shiny = \
+            parse_details(details)
+
+    def set_condition(self, condition):
+        """
+        Sets the pokemon's hp and status from condition. Ex: '45/100 par'
+        """
+        self.hp, max_hp, self.status = parse_condition(condition)
+        if max_hp is not None:
+            self.max_hp = max_hp
+
+    def boost(self, stat, amount):
+        """
+        Changes the pokemon's boost for stat by amount, staying within +-6.
+        """
+        index = BOOST_INDEX.get(stat)
+        if index is not None:
+            boost = self.boosts[index] + amount
+            self.boosts[index] = max(-MAX_BOOST, min(MAX_BOOST, boost))
+
+    def set_boost(self, stat, amount):
+        """
+        Sets the pokemon's boost for stat to amount.
+        """
+        index = BOOST_INDEX.get(stat)
+        if index is not None:
+            self.boosts[index] = max(-MAX_BOOST, min(MAX_BOOST, amount))
+
+    def clear_boosts(self):
+        """
+        Resets every boost of the pokemon to 0.
+        """
+        self.boosts[:] = [0] * len(BOOSTS)
+
+    def switch_out(self):
+        """
+        Clears the state a pokemon loses on leaving the field.
+        """
+        self.active = False
+        self.clear_boosts()
+        self.volatiles.clear()
+
+    def add_move(self, move):
+        """
+        Records a move used by the pokemon.
+        """
+        move_id = utils.name_to_id(move)
+        if move_id not in self.moves:
+            self.moves.append(move_id)
+
+class Side:
+    """
+    Class representing one player's side of a battle.
+
+    Args:
+        side_id (:obj:`str`) : The side's id. Ex: 'p1'
+
+    Attributes:
+        id (:obj:`str`) : The side's id. Ex: 'p1'
+        pokemon (:obj:`dict`) : Dictionary with entries of {name : Pokemon} for
+            every pokemon revealed on the side.
+        active (:obj:`list`) : The side's active Pokemon, indexed by slot.
+            Empty slots are None.
+        conditions (:obj:`dict`) : Dictionary with entries of {condition :
+            layers} for the side's conditions. Ex: {'Stealth Rock': 1,
+            'Spikes': 2}
+        team_size (:obj:`int` or None) : The number of pokemon on the side.
+        preview (:obj:`dict`) : Dictionary with entries of {species : Pokemon}
+            for pokemon shown in team preview that haven't been sent out yet.
+    """
+    __slots__ = ('id', 'pokemon', 'active', 'conditions', 'team_size',
+                 'preview')
+
+    def __init__(self, side_id):
+        self.id = side_id
+        self.pokemon = {}
+        self.active = [None]
+        self.conditions = {}
+        self.team_size = None
+        self.preview = {}
+
+    def __repr__(self):
+        return '<{} {} active={}>'.format(self.__class__.__name__, self.id,
+            self.active)
+
+    def get(self, name, details=''):
+        """
+        Returns the Pokemon with the given name, creating it if needed. A
+        pokemon seen in team preview is reused once it's sent out under its
+        nickname.
+        """
+        pokemon = self.pokemon.get(name)
+        if pokemon is None:
+            pokemon = details and self.preview.pop(
+                parse_details(details)[0], None)
+            if pokemon:
+                pokemon.name = name
+            else:
+                pokemon = Pokemon(name, details)
+            self.pokemon[name] = pokemon
+        return pokemon
+
+    def add_preview(self, details):
+        """
+        Adds a pokemon shown in team preview. Ex: 'Pikachu, L50, F'
+        """
+        pokemon = Pokemon('', details)
+        self.preview[pokemon.species] = pokemon
+        return pokemon
+
+    def switch_in(self, slot, pokemon):
+        """
+        Puts pokemon in the active slot, switching out its previous occupant.
+        """
+        while len(self.active) <= slot:
+            self.active.append(None)
+        previous = self.active[slot]
+        if previous is not None and previous is not pokemon:
+            previous.switch_out()
+        self.active[slot] = pokemon
+        pokemon.active = True
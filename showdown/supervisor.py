@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Module for the TaskSupervisor used to run a client's hook coroutines"""
+import asyncio
+import logging
+
+#Logging setup
+logger = logging.getLogger(__name__)
+
+BLOCK = 'block'
+DROP = 'drop'
+INLINE = 'inline'
+POLICIES = (BLOCK, DROP, INLINE)
+
+class TaskSupervisor:
+    """
+    Class used to run hook coroutines as detached tasks. Finished tasks are
+    released as soon as they complete, the number of tasks in flight is
+    capped, and exceptions raised inside tasks are logged.
+
+    Args:
+        max_tasks (:obj:`int` or None, optional) : The maximum number of tasks
+            that can be in flight at once. None disables the cap. Defaults to
+            1000.
+        policy (:obj:`str`, optional) : What to do with a new coroutine when
+            the cap has been reached. 'block' waits for a running task to
+            finish, 'drop' discards the coroutine, and 'inline' awaits the
+            coroutine directly in the caller. Defaults to 'block'.
+        loop (optional) : The event loop tasks are created on. Defaults to
+            asyncio.get_event_loop().
+
+    Attributes:
+        max_tasks (:obj:`int` or None) : The cap on tasks in flight.
+        policy (:obj:`str`) : The policy used when the cap is reached.
+        peak (:obj:`int`) : The highest number of tasks that have been in
+            flight at once.
+        failed (:obj:`int`) : The number of tasks that raised an exception.
+        dropped (:obj:`int`) : The number of coroutines discarded by the 'drop'
+            policy.
+        inlined (:obj:`int`) : The number of coroutines awaited directly by the
+            'inline' policy.
+        total (:obj:`int`) : The number of coroutines that have been run.
+    """
+    def __init__(self, max_tasks=1000, policy=BLOCK, loop=None):
+        if policy not in POLICIES:
+            raise ValueError('Unknown task supervisor policy `{}`. Use one of '
+                '{}.'.format(policy, ', '.join(POLICIES)))
+        if max_tasks is not None and max_tasks < 1:
+            raise ValueError('max_tasks should be a positive int or None')
+        self.max_tasks = max_tasks
+        self.policy = policy
+        self.loop = loop
+        self.peak = 0
+        self.failed = 0
+        self.dropped = 0
+        self.inlined = 0
+        self.total = 0
+        self._live = set()
+        self._waiters = []
+
+    def __len__(self):
+        return len(self._live)
+
+    def __repr__(self):
+        return '<{} live={} peak={} failed={}>'.format(
+            self.__class__.__name__, len(self._live), self.peak, self.failed)
+
+    def full(self):
+        """
+        Returns True if the number of tasks in flight has reached max_tasks.
+        """
+        return self.max_tasks is not None and len(self._live) >= self.max_tasks
+
+    async def spawn(self, coro):
+        """
+        |coro|
+
+        Runs coro under the supervisor, applying the supervisor's policy if
+        the cap on tasks in flight has been reached.
+
+        Returns:
+            The created task, or None if the coroutine was dropped or awaited
+            inline.
+        """
+        if self.full():
+            if self.policy == DROP:
+                self.dropped += 1
+                logger.warning('Task cap reached, dropping {}'.format(coro))
+                coro.close()
+                return None
+            if self.policy == INLINE:
+                self.inlined += 1
+                self.total += 1
+                try:
+                    await coro
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.failed += 1
+                    logger.exception('Exception in inlined hook {}'
+                        .format(coro))
+                return None
+            while self.full():
+                waiter = (self.loop or asyncio.get_event_loop()) \
+                    .create_future()
+                self._waiters.append(waiter)
+                try:
+                    await waiter
+                finally:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+        return self.start(coro)
+
+    def start(self, coro):
+        """
+        Runs coro as a supervised task regardless of the cap on tasks in
+        flight.
+
+        Returns:
+            asyncio.Task : The created task.
+        """
+        task = asyncio.ensure_future(coro, loop=self.loop)
+        self._live.add(task)
+        self.total += 1
+        self.peak = max(self.peak, len(self._live))
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task):
+        """
+        Releases a finished task, logs its exception and wakes up a blocked
+        spawn call.
+        """
+        self._live.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+            logger.error('Exception in hook task {}'.format(task),
+                exc_info=task.exception())
+        while self._waiters:
+            waiter = self._waiters.pop(0)
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    def cancel_all(self):
+        """
+        Cancels every task in flight.
+        """
+        for task in list(self._live):
+            if not task.done():
+                task.cancel()
+                logger.info('Cancelled: {}'.format(task))
+
+    def stats(self):
+        """
+        Returns a dict of the supervisor's task counts.
+        """
+        return {
+            'live': len(self._live),
+            'peak': self.peak,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'inlined': self.inlined,
+            'total': self.total
+        }
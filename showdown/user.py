@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 """Module for showdown's User class"""
-import json
 import re
 import requests
 import string
 import math
-from . import utils, server
+import weakref
+from . import utils, server, normalize
 
 USER_DATA_URL_BASE = 'https://pokemonshowdown.com/users/{user_id}.json'
 
@@ -30,21 +30,21 @@ class User:
             Ex: 'scriptkitty'
         client (obj:`showdown.client.Client` or None) : client used in the
             object's utility methods
+
+    Notes:
+        Instances have no __dict__. Subclasses that don't define __slots__,
+        such as showdown.client.Client, still get one.
     '''
+    __slots__ = ('auth', 'name', 'id', 'client', '_user_data', '__weakref__')
+
     def __init__(self, user_str, client=None):
-        if not user_str:
-            self.auth = ' '
-            name = ''
-        elif user_str[0].lower() not in string.ascii_lowercase:
-            self.auth = user_str[0]
-            name = user_str[1:]
-        else:
-            self.auth = ' '
-            name = user_str
+        self.auth, name = self.split_auth(user_str)
         self.set_name(name)
         self.client = client
         self._user_data = None
 
+    split_auth = staticmethod(normalize.split_auth)
+
     def __eq__(self, other):
         return isinstance(other, User) and self.id == other.id
 
@@ -69,7 +69,7 @@ class User:
                 name and id
         """
         self.name = name
-        self.id = utils.name_to_id(name)
+        self.id = normalize.name_to_id(name)
 
     def name_matches(self, name):
         """
@@ -89,7 +89,7 @@ class User:
            >>> User("~Zarel ^_^").name_matches('Carl'))
            False
         """
-        return self.id == utils.name_to_id(name)
+        return self.id == normalize.name_to_id(name)
 
     @utils.require_client
     async def challenge(self, team, tier, client=None):
@@ -282,4 +282,77 @@ class User:
         return utils.parse_http_input(result)
 
     async def get_ladder_async(self, server_id='showdown'):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+class UserRegistry:
+    """
+    Class used by a client to share User objects across its rooms and
+    messages. One User is kept per name and auth prefix it's seen with, so
+    a user with the same rank in many rooms is a single object, while a
+    user who is staff in one room and not in another gets one User for each
+    rank. Users are only weakly referenced, so they're dropped from the
+    registry once nothing else uses them.
+
+    Notes:
+        Shared Users are never updated in place, since their auth is the one
+        of the rooms and messages they came from. A rank or display name
+        change gives the user a new User, while objects already handed out
+        keep theirs.
+
+    Args:
+        client (obj:`showdown.client.Client`, optional) : client given to the
+            User objects created by the registry
+
+    Examples:
+        >>> registry = UserRegistry()
+        >>> registry.get('Zarel') is registry.get(' Zarel')
+        True
+        >>> registry.get('@Zarel'), registry.get(' Zarel')
+        (<User `@Zarel`>, <User `Zarel`>)
+    """
+    __slots__ = ('client', '_users', '_by_id')
+
+    def __init__(self, client=None):
+        self.client = client
+        self._users = weakref.WeakValueDictionary()
+        self._by_id = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, user_id):
+        return user_id in self._by_id
+
+    def __repr__(self):
+        return '<{} {} users>'.format(self.__class__.__name__, len(self))
+
+    def get(self, user_str):
+        """
+        Returns the User for user_str, creating it if it isn't registered.
+
+        Args:
+            user_str (obj:`str`) : The user's name, optionally prefixed by
+                their auth group. Ex: "~Zarel", "Script Kitty"
+        """
+        auth, name = User.split_auth(user_str)
+        key = auth + name
+        existing = self._users.get(key)
+        if existing is None:
+            existing = self._users[key] = User(key, client=self.client)
+        self._by_id[existing.id] = existing
+        return existing
+
+    def find(self, user_id):
+        """
+        Returns the User with user_id that was seen last, or None.
+        """
+        return self._by_id.get(user_id)
+
+def get_user(user_str, client=None):
+    """
+    Returns the User for user_str from client's registry, or a new User if
+    there's no client.
+    """
+    if client is not None:
+        return client.users.get(user_str)
+    return User(user_str)
@@ -1,15 +1,13 @@
 # -*- coding: utf-8 -*-
 """Miscellaneous utils for the showdown module"""
-import json
-import re
 import random
-import string
 import inspect
 import warnings
 import datetime
 import traceback
 import inspect
 from functools import wraps
+from . import jsonlib, event, normalize
 
 def require_client(func): 
     """
@@ -39,19 +37,8 @@ def require_client(func):
             return await func(self, *args, **kwargs)
     return wrapper
 
-def strip_prefix(s):
-    """ 
-    Strips off nonletter prefix from a string.
-
-    Examples:
-        >>> strip_prefix('~lobby')
-        'lobby'
-        >>> strip_prefix('+Argus2Spooky')
-        'Argus2Spooky'
-    """
-    if s and s[0].lower() not in string.ascii_lowercase:
-        s = s[1:]
-    return s
+#Id normalization lives in showdown.normalize
+strip_prefix = normalize.strip_prefix
 
 def timestamp_to_hh_mm_ss(timestamp):
     """
@@ -106,32 +93,19 @@ def abbreviate(content):
     content_length = len(content)
     return content[:20].rstrip() + ('...' if content_length > 20 else '')
 
-def name_to_id(input_str):
-    """
-    Removes all non-letter or number characters from input_str, and lowercases.
-
-    Example:
-        >>> name_to_id('Zarel ^_^')
-        'zarel'
-    """
-    return re.sub(r'(\W|_)', '', input_str.lower())
+name_to_id = normalize.name_to_id
 
 #Parsing
 def parse_text_input(text_input):
     """
     Parses the text input received over the client's websocket connection.
+    Use showdown.event.Event directly to only split the input when needed.
 
     Returns:
         (input_type (str), params (list))
     """
-    tokens = text_input.strip().split('|')
-    if len(tokens) == 1:
-        inp_type = 'rawtext'
-        params = tokens
-    else:
-        inp_type = tokens[1].lower()
-        params = tokens[2:]
-    return inp_type, params
+    inp_event = event.Event(text_input)
+    return inp_event.type, inp_event.params
 
 def parse_http_input(http_input):
     """
@@ -141,9 +115,40 @@ def parse_http_input(http_input):
         dict : Dictionary representing a JSON object.
     """
     if http_input.startswith(']'):
-        return json.loads(http_input[1:])
+        return jsonlib.loads(http_input[1:])
     raise ValueError('Unexpected http input:\n{}'.format(http_input))
 
+def iter_socket_input(socket_input):
+    """
+    Parses the raw input received over the client's socket_input, yielding
+    each event as it is found in the frame.
+
+    Yields:
+        (room_id (str), text_input (str))
+
+    Examples:
+        >>> list(iter_socket_input('a[">lobby\\\\n|j|Zarel\\\\n|l|Zarel"]'))
+        [('lobby', '|j|Zarel'), ('lobby', '|l|Zarel')]
+    """
+    if not socket_input.startswith('a'):
+        raise ValueError('Unexpected socket input:\n{}'.format(socket_input))
+    for row in jsonlib.loads(socket_input[1:]):
+        end = len(row)
+        pos = 0
+        room_id = ''
+        if row.startswith('>'):
+            pos = row.find('\n')
+            if pos == -1:
+                pos = end
+            room_id = row[1:pos] or 'lobby'
+            pos += 1
+        while pos < end:
+            newline = row.find('\n', pos)
+            if newline == -1:
+                newline = end
+            yield room_id, row[pos:newline]
+            pos = newline + 1
+
 def parse_socket_input(socket_input):
     """
     Parses the raw input received over the client's socket_input
@@ -151,21 +156,7 @@ def parse_socket_input(socket_input):
     Returns:
         (room_id (str), text_input (str))
     """
-    if socket_input.startswith('a'):
-        loaded = json.loads(socket_input[1:])
-        result = []
-        for row in loaded:
-            loaded = row.splitlines()
-            if loaded[0].startswith('>'):
-                room_id = loaded[0][1:] or 'lobby'
-                raw_events = loaded[1:]
-            else:
-                room_id = ''
-                raw_events = loaded
-            for event in raw_events:
-                result.append((room_id, event))
-        return result
-    raise ValueError('Unexpected socket input:\n{}'.format(socket_input))
+    return list(iter_socket_input(socket_input))
 
 def _extract_nums(row):
     """